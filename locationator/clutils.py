@@ -7,7 +7,7 @@ import json
 import textwrap
 from dataclasses import asdict, dataclass
 
-from Contacts import CNPostalAddress, CNPostalAddressStreetKey
+from Contacts import CNPostalAddress
 from CoreLocation import (
     CLLocation,
     CLPlacemark,
@@ -19,9 +19,37 @@ from CoreLocation import (
     kCLLocationAccuracyReduced,
     kCLLocationAccuracyThreeKilometers,
 )
-from Foundation import NSDate
 from utils import flatten_dict, str_or_none
 
+# CLPlacemark string properties copied by placemark_to_dict, in output order
+PLACEMARK_ADDRESS_KEYS = (
+    "name",
+    "thoroughfare",
+    "subThoroughfare",
+    "locality",
+    "subLocality",
+    "administrativeArea",
+    "subAdministrativeArea",
+    "postalCode",
+    "ISOcountryCode",
+    "country",
+)
+
+# CLPlacemark water body properties, which follow postalAddress in placemark_to_dict
+PLACEMARK_WATER_KEYS = ("inlandWater", "ocean")
+
+# CNPostalAddress properties copied by postal_address_to_dict, in output order
+POSTAL_ADDRESS_KEYS = (
+    "street",
+    "city",
+    "state",
+    "country",
+    "postalCode",
+    "ISOCountryCode",
+    "subAdministrativeArea",
+    "subLocality",
+)
+
 
 @dataclass
 class Location:
@@ -92,31 +120,25 @@ def placemark_to_dict(placemark: CLPlacemark) -> dict:
     timezone = placemark.timeZone()
     postalAddress = postal_address_to_dict(placemark.postalAddress())
 
-    areasOfInterest = []
-    if placemark.areasOfInterest():
-        for i in range(placemark.areasOfInterest().count()):
-            areasOfInterest.append(
-                str_or_none(placemark.areasOfInterest().objectAtIndex_(i))
-            )
+    # fetch the array once rather than once per element
+    areasOfInterest = [
+        str_or_none(area) for area in (placemark.areasOfInterest() or ())
+    ]
 
     placemark_dict = {
         "location": (
             coordinate.latitude,
             coordinate.longitude,
         ),
-        "name": str_or_none(placemark.name()),
-        "thoroughfare": str_or_none(placemark.thoroughfare()),
-        "subThoroughfare": str_or_none(placemark.subThoroughfare()),
-        "locality": str_or_none(placemark.locality()),
-        "subLocality": str_or_none(placemark.subLocality()),
-        "administrativeArea": str_or_none(placemark.administrativeArea()),
-        "subAdministrativeArea": str_or_none(placemark.subAdministrativeArea()),
-        "postalCode": str_or_none(placemark.postalCode()),
-        "ISOcountryCode": str_or_none(placemark.ISOcountryCode()),
-        "country": str_or_none(placemark.country()),
+        **{
+            key: str_or_none(getattr(placemark, key)())
+            for key in PLACEMARK_ADDRESS_KEYS
+        },
         "postalAddress": postalAddress,
-        "inlandWater": str_or_none(placemark.inlandWater()),
-        "ocean": str_or_none(placemark.ocean()),
+        **{
+            key: str_or_none(getattr(placemark, key)())
+            for key in PLACEMARK_WATER_KEYS
+        },
         "areasOfInterest": areasOfInterest,
         "timeZoneName": str_or_none(timezone.name()),
         "timeZoneAbbreviation": str_or_none(timezone.abbreviation()),
@@ -135,38 +157,21 @@ def postal_address_to_dict(postalAddress: CNPostalAddress) -> dict:
     Returns: dict containing the postalAddress data
     """
     if not postalAddress:
-        return {
-            "street": "",
-            "city": "",
-            "state": "",
-            "country": "",
-            "postalCode": "",
-            "ISOCountryCode": "",
-            "subAdministrativeArea": "",
-            "subLocality": "",
-        }
-
-    postalAddress_dict = {
-        "street": str_or_none(postalAddress.street()),
-        "city": str_or_none(postalAddress.city()),
-        "state": str_or_none(postalAddress.state()),
-        "country": str_or_none(postalAddress.country()),
-        "postalCode": str_or_none(postalAddress.postalCode()),
-        "ISOCountryCode": str_or_none(postalAddress.ISOCountryCode()),
-        "subAdministrativeArea": str_or_none(postalAddress.subAdministrativeArea()),
-        "subLocality": str_or_none(postalAddress.subLocality()),
-    }
+        return dict.fromkeys(POSTAL_ADDRESS_KEYS, "")
 
-    return postalAddress_dict
+    return {
+        key: str_or_none(getattr(postalAddress, key)()) for key in POSTAL_ADDRESS_KEYS
+    }
 
 
 def format_result_dict(d: dict) -> str:
     """Format a reverse geocode result dict for display"""
-    result_dict = flatten_dict(d)
-    for key, value in result_dict.items():
-        if isinstance(value, (list, tuple)):
-            result_dict[key] = ", ".join(str(v) for v in value)
-    return "\n".join(f"{key}: {value}" for key, value in result_dict.items())
+    return "\n".join(
+        f"{key}: {', '.join(str(v) for v in value)}"
+        if isinstance(value, (list, tuple))
+        else f"{key}: {value}"
+        for key, value in flatten_dict(d).items()
+    )
 
 
 def validate_accuracy(accuracy: float) -> bool:
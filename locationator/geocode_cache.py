@@ -0,0 +1,220 @@
+"""Thread-safe cache for reverse geocode results, optionally persisted to a SQLite database"""
+
+from __future__ import annotations
+
+import contextlib
+import copy
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+# number of decimal places latitude/longitude are rounded to for the cache key
+# 5 decimal places is approximately 1 meter
+CACHE_KEY_PRECISION = 5
+
+
+def encode_result(data: dict[str, Any]) -> str:
+    """Encode a reverse geocode result as compact JSON"""
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
+class GeocodeCache:
+    """Least recently used cache of reverse geocode results with a time-to-live.
+
+    Results are keyed on latitude/longitude rounded to CACHE_KEY_PRECISION decimal places.
+    The cache may be safely accessed from multiple threads.
+    Each result is also stored as JSON so it can be returned by get_json() without encoding it again.
+    If a path is given, results are also stored in a SQLite database at that path
+    so they persist across restarts; the database is written by a background thread
+    so reading the cache never waits on disk I/O.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 4096,
+        ttl: float = 86400.0,
+        path: str | os.PathLike | None = None,
+    ):
+        """Create cache
+
+        Args:
+            maxsize: maximum number of results to store; least recently used results are evicted first
+            ttl: time in seconds after which a result expires
+            path: optional path to SQLite database used to persist the cache;
+                if the database cannot be opened, the cache is kept in memory only
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # key: (expiration time, result, result encoded as JSON)
+        self._cache: OrderedDict[
+            tuple[float, float], tuple[float, dict[str, Any], bytes]
+        ] = OrderedDict()
+        self._lock = threading.Lock()
+        # database connection, used only by the writer thread once it's started
+        self._db: sqlite3.Connection | None = None
+        # statements waiting to be executed by the writer thread; None stops it
+        self._db_queue: queue.SimpleQueue[tuple[str, tuple] | None] = (
+            queue.SimpleQueue()
+        )
+        self._db_thread: threading.Thread | None = None
+        if path:
+            self._open_db(path)
+
+    @staticmethod
+    def key(latitude: float, longitude: float) -> tuple[float, float]:
+        """Return the cache key for latitude/longitude"""
+        return (
+            round(float(latitude), CACHE_KEY_PRECISION),
+            round(float(longitude), CACHE_KEY_PRECISION),
+        )
+
+    def get(self, latitude: float, longitude: float) -> dict[str, Any] | None:
+        """Return a copy of the cached result for latitude/longitude or None if not cached"""
+        entry = self._get_entry(latitude, longitude)
+        # callers may modify the result so don't hand out the cached dict
+        return copy.deepcopy(entry[1]) if entry else None
+
+    def get_json(self, latitude: float, longitude: float) -> bytes | None:
+        """Return the cached result for latitude/longitude encoded as UTF-8 JSON or None if not cached"""
+        entry = self._get_entry(latitude, longitude)
+        return entry[2] if entry else None
+
+    def set(self, latitude: float, longitude: float, data: dict[str, Any]):
+        """Store the result for latitude/longitude"""
+        key = self.key(latitude, longitude)
+        data = copy.deepcopy(data)
+        encoded = encode_result(data)
+        with self._lock:
+            self._cache[key] = (time.monotonic() + self.ttl, data, encoded.encode())
+            self._cache.move_to_end(key)
+            self._db_execute(
+                "INSERT OR REPLACE INTO geocode VALUES (?, ?, ?, ?)",
+                (*key, time.time(), encoded),
+            )
+            while len(self._cache) > self.maxsize:
+                evicted, _ = self._cache.popitem(last=False)
+                self._db_delete(evicted)
+
+    def clear(self):
+        """Remove all results from the cache"""
+        with self._lock:
+            self._cache.clear()
+            self._db_execute("DELETE FROM geocode")
+
+    def close(self):
+        """Write pending results and close the database; the cache continues to work in memory only"""
+        with self._lock:
+            if self._db is None:
+                return
+            self._db = None
+            self._db_queue.put(None)
+        self._db_thread.join()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._cache)
+
+    def _get_entry(
+        self, latitude: float, longitude: float
+    ) -> tuple[float, dict[str, Any], bytes] | None:
+        """Return the unexpired cache entry for latitude/longitude or None if not cached"""
+        key = self.key(latitude, longitude)
+        with self._lock:
+            try:
+                entry = self._cache[key]
+            except KeyError:
+                return None
+            if entry[0] < time.monotonic():
+                del self._cache[key]
+                self._db_delete(key)
+                return None
+            self._cache.move_to_end(key)
+            return entry
+
+    def _open_db(self, path: str | os.PathLike):
+        """Open the database at path and load unexpired results into the cache
+
+        Rows that can't be decoded are skipped.
+        """
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            db = sqlite3.connect(path, check_same_thread=False)
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS geocode "
+                "(latitude REAL, longitude REAL, created REAL, data TEXT, "
+                "PRIMARY KEY (latitude, longitude))"
+            )
+            now = time.time()
+            db.execute("DELETE FROM geocode WHERE created < ?", (now - self.ttl,))
+            db.commit()
+            rows = db.execute(
+                "SELECT latitude, longitude, created, data FROM geocode "
+                "ORDER BY created DESC LIMIT ?",
+                (self.maxsize,),
+            ).fetchall()
+        except (OSError, sqlite3.Error):
+            return
+        monotonic_now = time.monotonic()
+        # rows are newest first; insert oldest first so they're evicted first
+        for latitude, longitude, created, data in reversed(rows):
+            try:
+                data = json.loads(data)
+            except (TypeError, ValueError):
+                # don't let a corrupt row stop the app from starting
+                continue
+            expires = monotonic_now + (created + self.ttl - now)
+            self._cache[(latitude, longitude)] = (
+                expires,
+                data,
+                encode_result(data).encode(),
+            )
+        self._db = db
+        self._db_thread = threading.Thread(
+            target=self._db_writer, args=(db,), name="GeocodeCacheWriter", daemon=True
+        )
+        self._db_thread.start()
+
+    def _db_writer(self, db: sqlite3.Connection):
+        """Execute the statements queued by _db_execute(); runs on its own thread
+
+        Statements queued while a batch is being written are committed together.
+        If a statement fails, the database is closed and the cache continues in memory only.
+        """
+        closing = False
+        while not closing:
+            statements = [self._db_queue.get()]
+            with contextlib.suppress(queue.Empty):
+                while True:
+                    statements.append(self._db_queue.get_nowait())
+            try:
+                for statement in statements:
+                    if statement is None:
+                        closing = True
+                        break
+                    db.execute(*statement)
+                db.commit()
+            except sqlite3.Error:
+                with self._lock:
+                    self._db = None
+                break
+        db.close()
+
+    def _db_delete(self, key: tuple[float, float]):
+        """Delete key from the database; must be called with the lock held"""
+        self._db_execute(
+            "DELETE FROM geocode WHERE latitude = ? AND longitude = ?", key
+        )
+
+    def _db_execute(self, sql: str, parameters: tuple = ()):
+        """Queue a statement for the writer thread if the database is open; must be called with the lock held
+
+        Statements are queued with the lock held so they're written in the same order
+        as the changes to the cache they mirror.
+        """
+        if self._db is not None:
+            self._db_queue.put((sql, parameters))
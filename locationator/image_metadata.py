@@ -20,9 +20,16 @@ this is done with `del Object` in pyobjc.
 
 from __future__ import annotations
 
+import contextlib
+import ctypes
+import ctypes.util
+import functools
+import logging
 import os
 import pathlib
-from typing import Any, TypeVar
+import shutil
+import threading
+from typing import Any, Iterable, TypeVar
 
 import objc
 import Quartz
@@ -47,6 +54,7 @@ from Quartz import (
     CGImageDestinationCreateWithURL,
     CGImageDestinationFinalize,
     CGImageMetadataCopyTags,
+    CGImageMetadataCreateFromXMPData,
     CGImageMetadataCreateMutableCopy,
     CGImageMetadataCreateXMPData,
     CGImageMetadataRef,
@@ -70,6 +78,16 @@ CGMutableImageMetadataRef = CGImageMetadataRef
 
 FilePath = TypeVar("FilePath", str, pathlib.Path, os.PathLike)
 
+logger = logging.getLogger(__name__)
+
+# suffix for the temporary file used when writing metadata to an image
+TEMP_FILE_SUFFIX = ".locationator.tmp"
+
+# copyfile(3) flags used to copy a file's ACL and extended attributes,
+# which include Finder tags and comments
+COPYFILE_ACL = 1 << 0
+COPYFILE_XATTR = 1 << 2
+
 
 class MetadataError(Exception):
     """Error calling CGImageMetadata functions."""
@@ -77,6 +95,41 @@ class MetadataError(Exception):
     pass
 
 
+class SharedPipes:
+    """Context manager that discards stdout/stderr while any thread is inside it.
+
+    wurlitzer's pipes() redirects the process-wide stdout/stderr file descriptors so
+    two threads can't each enter it; instead the first thread to enter this context
+    manager enters pipes() and the last one to leave exits it. Threads inside it don't
+    wait on each other. Use the shared_pipes instance.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._users = 0
+        self._pipes: contextlib.AbstractContextManager | None = None
+
+    def __enter__(self):
+        with self._lock:
+            if not self._users:
+                pipes_context = pipes()
+                pipes_context.__enter__()
+                self._pipes = pipes_context
+            self._users += 1
+
+    def __exit__(self, *exc_info):
+        with self._lock:
+            self._users -= 1
+            if not self._users:
+                self._pipes.__exit__(None, None, None)
+                self._pipes = None
+
+
+# enter once around a batch of metadata_ref_write_to_file() calls so stdout/stderr
+# are redirected once for the batch rather than once per file
+shared_pipes = SharedPipes()
+
+
 def load_image_properties(
     image_path: FilePath,
 ) -> dict[str, Any]:
@@ -191,6 +244,19 @@ def metadata_ref_create_xmp(metadata_ref: CGImageMetadataRef) -> bytes:
         return bytes(xmp)
 
 
+def metadata_ref_create_from_xmp(xmp: bytes) -> CGMutableImageMetadataRef | None:
+    """Create a CGMutableImageMetadataRef from serialized XMP or None if it can't be parsed."""
+    with objc.autorelease_pool():
+        metadata_ref = CGImageMetadataCreateFromXMPData(
+            NSData.dataWithBytes_length_(xmp, len(xmp))
+        )
+        if not metadata_ref:
+            return None
+        metadata_ref_mutable = CGImageMetadataCreateMutableCopy(metadata_ref)
+        del metadata_ref
+        return metadata_ref_mutable
+
+
 def metadata_ref_create_mutable(
     metadata_ref: CGImageMetadataRef | CGMutableImageMetadataRef,
 ) -> CGMutableImageMetadataRef:
@@ -224,24 +290,69 @@ def metadata_ref_set_tag(
         )
 
 
+def metadata_ref_set_tags(
+    metadata_ref: CGMutableImageMetadataRef,
+    tags: dict[str, Any],
+) -> CGMutableImageMetadataRef:
+    """Set multiple metadata tags in a CGMutableImageMetadataRef
+
+    Args:
+        metadata_ref: A CGMutableImageMetadataRef
+        tags: dict of tag path: value to set
+
+    Returns: CGMutableImageMetadataRef with the tags set
+
+    Raises:
+        MetadataError: If any tag could not be set.
+
+    Note: Unlike calling metadata_ref_set_tag() for each tag, all tags are set
+    in place within a single autorelease pool.
+    """
+    with objc.autorelease_pool():
+        for tag_path, value in tags.items():
+            if not CGImageMetadataSetValueWithPath(metadata_ref, None, tag_path, value):
+                raise MetadataError(
+                    f"Could not set tag {tag_path} to {value}; "
+                    "verify the tag and value are valid and that metadata_ref is a CGMutableImageMetadataRef"
+                )
+    return metadata_ref
+
+
 def metadata_ref_write_to_file(
     image_path: FilePath, metadata_ref: CGImageMetadataRef
 ) -> None:
+    """Write the image at image_path back to disk with the metadata in metadata_ref.
+
+    Args:
+        image_path: Path to the image file.
+        metadata_ref: CGImageMetadataRef containing the metadata to write.
+
+    Raises:
+        MetadataError: If the image could not be written.
+
+    Note: The image is written to a temporary file in the same directory which then
+    replaces the original with replace_file() so a failed write never leaves a partially
+    written image behind. Symlinks are resolved so the file they point to is updated.
+    The rename is not flushed to disk; call fsync_parent_directories() once after writing
+    a batch of files if durability is required.
+    """
+    image_path = os.path.realpath(image_path)
+    temp_path = f"{image_path}{TEMP_FILE_SUFFIX}"
     with objc.autorelease_pool():
-        image_url = NSURL.fileURLWithPath_(str(image_path))
+        image_url = NSURL.fileURLWithPath_(image_path)
         image_source = CGImageSourceCreateWithURL(image_url, None)
         if not image_source:
             raise MetadataError(f"Could not create image source for {image_path}")
         image_type = CGImageSourceGetType(image_source)
-        print(f"image_type: {image_type}")
-        destination = CGImageDestinationCreateWithURL(image_url, image_type, 1, None)
+        temp_url = NSURL.fileURLWithPath_(temp_path)
+        destination = CGImageDestinationCreateWithURL(temp_url, image_type, 1, None)
         if not destination:
             raise MetadataError(f"Could not create image destination for {image_path}")
-        with pipes() as (_out, _err):
+        with shared_pipes:
             # On some versions of macOS this causes error to stdout
             # of form: AVEBridge Info: AVEEncoder_CreateInstance: Received CreateInstance (from VT)...
             # even though the operation succeeds
-            # Use pipes() to suppress this error
+            # Use shared_pipes to suppress this error
             image_data = CGImageSourceCreateImageAtIndex(image_source, 0, None)
             CGImageDestinationAddImageAndMetadata(
                 destination,
@@ -249,11 +360,118 @@ def metadata_ref_write_to_file(
                 metadata_ref,
                 None,
             )
-            CGImageDestinationFinalize(destination)
+            success = CGImageDestinationFinalize(destination)
         del image_source
         del image_data
         del destination
 
+    if not success:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(temp_path)
+        raise MetadataError(f"Could not write metadata to {image_path}")
+
+    replace_file(temp_path, image_path)
+
+
+def replace_file(temp_path: str, path: str):
+    """Replace the file at path with temp_path, which is removed.
+
+    Args:
+        temp_path: Path to the new file; must be on the same file system as path.
+        path: Path to the file to replace; should have symlinks resolved.
+
+    Note: temp_path is flushed to disk with fsync() then replaces path with os.replace()
+    after path's ownership, permissions, flags, ACL and extended attributes are copied
+    to it; if they can't be copied, temp_path is instead copied over path in place,
+    which is not atomic, and a warning is logged.
+    """
+    try:
+        # flush the new file before the rename so the renamed file can't be
+        # left without its data after a crash
+        _fsync_file(temp_path)
+        if _copy_file_metadata(path, temp_path):
+            os.replace(temp_path, path)
+        else:
+            logger.warning(
+                "could not copy file metadata to %s; writing %s in place",
+                temp_path,
+                path,
+            )
+            _copy_contents_in_place(temp_path, path)
+    finally:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(temp_path)
+
+
+@functools.cache
+def _copyfile() -> Any:
+    """Return the C library's copyfile(3) function"""
+    copyfile = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True).copyfile
+    copyfile.argtypes = [
+        ctypes.c_char_p,
+        ctypes.c_char_p,
+        ctypes.c_void_p,
+        ctypes.c_uint32,
+    ]
+    copyfile.restype = ctypes.c_int
+    return copyfile
+
+
+def _copy_file_metadata(src: str, dst: str) -> bool:
+    """Copy ownership, permissions, flags, ACL and extended attributes of src to dst
+
+    Returns: True if the metadata was copied, False if it could not be
+    """
+    try:
+        stat = os.stat(src)
+        dst_stat = os.stat(dst)
+        if (stat.st_uid, stat.st_gid) != (dst_stat.st_uid, dst_stat.st_gid):
+            os.chown(dst, stat.st_uid, stat.st_gid)
+        if _copyfile()(
+            os.fsencode(src), os.fsencode(dst), None, COPYFILE_ACL | COPYFILE_XATTR
+        ):
+            return False
+        # timestamps aren't copied: the contents changed so, as with an in-place
+        # write, the modification time should too
+        shutil.copymode(src, dst)
+        if getattr(stat, "st_flags", 0):
+            os.chflags(dst, stat.st_flags)
+    except (OSError, AttributeError):
+        return False
+    return True
+
+
+def _copy_contents_in_place(src: str, dst: str):
+    """Overwrite the contents of dst with the contents of src, keeping dst's inode and metadata"""
+    with open(src, "rb") as src_file, open(dst, "r+b") as dst_file:
+        shutil.copyfileobj(src_file, dst_file)
+        dst_file.truncate()
+        dst_file.flush()
+        os.fsync(dst_file.fileno())
+
+
+def _fsync_file(path: str):
+    """Flush the contents of the file at path to disk"""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def fsync_parent_directories(paths: Iterable[FilePath]) -> None:
+    """Flush the directory entries of the parent directories of paths to disk.
+
+    Use after writing a batch of files with metadata_ref_write_to_file() so that
+    each directory is synced once instead of once per file.
+    """
+    for directory in {os.path.dirname(os.path.abspath(str(p))) for p in paths}:
+        fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
 
 def NSDictionary_to_dict_recursive(ns_dict: NSDictionary) -> dict[str, Any]:
     """Convert an NSDictionary to a Python dict recursively; handles subset of types needed for image metadata."""
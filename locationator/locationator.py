@@ -2,23 +2,40 @@
 
 from __future__ import annotations
 
+import concurrent.futures
 import contextlib
 import datetime
-import json
+import logging
+import logging.handlers
 import os
 import pathlib
 import plistlib
 import queue
+import random
 import shlex
+import subprocess
 import threading
 import time
-from collections import namedtuple
-from typing import Any
+from dataclasses import dataclass
+from typing import Any, Callable
+from xml.parsers.expat import ExpatError
 
 import objc
 import rumps
-from AppKit import NSApplication, NSPasteboardTypeFileURL
-from clutils import Location_from_CLLocation, format_result_dict, placemark_to_dict
+from AppKit import NSApplication, NSPasteboardURLReadingFileURLsOnlyKey
+from clutils import (
+    Location,
+    Location_from_CLLocation,
+    format_result_dict,
+    placemark_to_dict,
+)
+from CoreFoundation import (
+    CFRunLoopGetCurrent,
+    CFRunLoopRunInMode,
+    CFRunLoopStop,
+    kCFRunLoopDefaultMode,
+    kCFRunLoopRunFinished,
+)
 from CoreLocation import (
     CLGeocoder,
     CLLocation,
@@ -28,21 +45,22 @@ from CoreLocation import (
     kCLAuthorizationStatusDenied,
     kCLAuthorizationStatusNotDetermined,
     kCLAuthorizationStatusRestricted,
+    kCLErrorDomain,
+    kCLErrorNetwork,
     kCLLocationAccuracyBest,
 )
-from Foundation import (
-    NSURL,
-    NSArray,
-    NSDate,
-    NSLog,
-    NSObject,
-    NSRunLoop,
-    NSString,
-    NSUTF8StringEncoding,
+from Foundation import NSURL, NSArray, NSLog, NSObject
+from geocode_cache import GeocodeCache
+from image_metadata import (
+    MetadataError,
+    fsync_parent_directories,
+    load_image_location,
+    logger as image_metadata_logger,
+    shared_pipes,
 )
-from image_metadata import load_image_location
 from loginitems import add_login_item, list_login_items, remove_login_item
 from pasteboard import Pasteboard
+from PyObjCTools import AppHelper
 from server import run_server
 from utils import get_app_path, get_lat_long_from_string
 from xmp import write_xmp_metadata
@@ -61,6 +79,9 @@ CONFIG_FILE = f"{APP_NAME}.plist"
 # optional logging to file if debug enabled (will always log to Console via NSLog)
 LOG_FILE = f"{APP_NAME}.log"
 
+# prefix for every message written to Console via NSLog
+LOG_PREFIX = f"{APP_NAME} {__version__} "
+
 # what port to run the server on
 SERVER_PORT = 8000
 
@@ -72,13 +93,61 @@ AUTH_STATUS = {
     kCLAuthorizationStatusRestricted: "Restricted",
 }
 
+# authorization statuses for which Location Services is enabled for the app
+AUTH_STATUS_AUTHORIZED = (
+    kCLAuthorizationStatusAuthorized,
+    kCLAuthorizationStatusAuthorizedAlways,
+)
+
+# alert shown by the "Check Location Services authorization status" menu
+AUTH_STATUS_TITLE = "Authorization status"
+AUTH_STATUS_MESSAGE = (
+    f"{APP_NAME} {__version__}\nauthorization status: {{status_str}} ({{status}}){{enable_str}}"
+)
+AUTH_ENABLE_HINT = (
+    "\n\nTo enable Location Services, go to "
+    "System Preferences > Security & Privacy > Privacy > Location Services "
+    f"and check the box next to {APP_NAME}."
+)
+
 # how long to wait in seconds for reverse geocode to complete
 REVERSE_GEOCODE_TIMEOUT = 15.0
 
+# maximum number of reverse geocode results to cache
+GEOCODE_CACHE_SIZE = 4096
+
+# how long in seconds to cache reverse geocode results
+GEOCODE_CACHE_TTL = 24 * 60 * 60
+
+# reverse geocode results are persisted here so the cache survives restarts
+GEOCODE_CACHE_FILE = os.path.expanduser(
+    f"~/Library/Caches/{APP_NAME}/geocode_cache.sqlite"
+)
+
+# number of times to retry a reverse geocode that fails with a network error,
+# which is how CoreLocation reports that requests are being throttled
+GEOCODE_MAX_RETRIES = 3
+
+# initial delay in seconds before retrying a reverse geocode; doubled on each retry
+GEOCODE_RETRY_DELAY = 0.5
+
+# maximum delay in seconds between reverse geocode retries
+GEOCODE_RETRY_MAX_DELAY = 4.0
+
+# location reverse geocoded at launch to load CoreLocation's geocoding machinery
+# before the first real request; the result is discarded
+GEOCODE_WARMUP_LOCATION = (0.0, 0.0)
+
+# how long to wait in seconds for the warm-up reverse geocode; kept short
+# as requests made while it runs are queued behind it
+GEOCODE_WARMUP_TIMEOUT = 2.0
+
 # how long to wait in seconds for a location request to complete
 LOCATION_REQUEST_TIMEOUT = 10.0
 
-# how long to sleep in seconds before checking if a location result is done
+# how long to sleep in seconds before checking if a result is done
+# when the waiting thread's run loop has nothing to run; only used by
+# _run_loop_until() if called off the main thread
 WAIT_INTERVAL = 0.05
 
 # titles for install/remove menu
@@ -88,9 +157,29 @@ REMOVE_TOOLS_TITLE = "Remove command line tool"
 CLI_NAME = "locationator"
 TOOLS_INSTALL_PATH = "/usr/local/bin"
 
-LocationResult = namedtuple(
-    "LocationResult", ["location", "datetime", "error"], defaults=[None, None, None]
-)
+# how long in seconds to wait for the user to authorize and run the install/remove command
+ADMIN_COMMAND_TIMEOUT = 60
+
+# how long in seconds the result of tools_installed() is cached
+TOOLS_INSTALLED_CACHE_TTL = 2.0
+
+# how long in seconds save_config() waits before writing so a burst of changes is written once
+CONFIG_SAVE_DELAY = 0.25
+
+# maximum number of per-file errors listed in the Services menu error alert
+MAX_ERRORS_IN_ALERT = 10
+
+# number of threads used to read and write metadata of image files passed by the Services menu
+IMAGE_WORKERS = 4
+
+
+@dataclass(slots=True)
+class LocationResult:
+    """Result of a location request, filled in by the location delegate methods"""
+
+    location: Location | None = None
+    datetime: datetime.datetime | None = None
+    error: Any = None
 
 
 class ReverseGeocodeError(Exception):
@@ -105,9 +194,58 @@ class LocationRequestError(Exception):
     pass
 
 
+class NSLogHandler(logging.Handler):
+    """Logging handler that writes records to the unified log with NSLog"""
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            # pass message as an argument so any % in the message isn't treated as a format specifier
+            NSLog("%@", self.format(record))
+        except Exception:
+            self.handleError(record)
+
+
+def log_noop(msg: str, *args: Any):
+    """Discard a log message; Locationator.log_debug is bound to this when debug is disabled"""
+    pass
+
+
+class BufferedFileHandler(logging.FileHandler):
+    """FileHandler that writes records through the file's buffer without flushing each one
+
+    The buffer is written to disk when flush_buffer() is called, when the buffer is full,
+    or when the handler is closed.
+    """
+
+    def flush(self):
+        # StreamHandler.emit() calls flush() after every record; see flush_buffer()
+        pass
+
+    def flush_buffer(self):
+        """Write buffered records to the file"""
+        super().flush()
+
+
+class LogQueueListener(logging.handlers.QueueListener):
+    """QueueListener that flushes BufferedFileHandlers once the queue has been drained
+
+    A burst of records is written to the log file with a single write instead of one per record.
+    """
+
+    def handle(self, record: logging.LogRecord):
+        super().handle(record)
+        if self.queue.empty():
+            for handler in self.handlers:
+                if isinstance(handler, BufferedFileHandler):
+                    handler.flush_buffer()
+
+
 class Locationator(rumps.App):
     """MacOS Menu Bar App to perform reverse geocoding from latitude/longitude."""
 
+    # CLLocationManager shared by all instances; see location_manager_for()
+    _shared_location_manager: CLLocationManager | None = None
+
     def __init__(self, *args, **kwargs):
         super(Locationator, self).__init__(*args, **kwargs)
 
@@ -118,11 +256,31 @@ class Locationator(rumps.App):
         # if set in config, will be updated by load_config()
         self._debug = False
 
+        # paths of files in the Application Support folder, resolved once
+        self._config_path = os.path.join(self._application_support, CONFIG_FILE)
+        self._log_file_path = os.path.join(self._application_support, LOG_FILE)
+
+        # log records are written by a background thread so logging doesn't block
+        # the caller (e.g. a completion handler) on NSLog or file I/O
+        self._init_logging()
+
         # what port to run the server on
         # set "port" in the config file to change this
         # if set in config, will be updated by load_config()
         self.port = SERVER_PORT
 
+        # (stat key, config) of the config file as last read or written
+        # so load_config() only parses the file when it changes
+        self._config_cache: tuple[tuple[int, int, int], dict[str, Any]] | None = None
+
+        # config waiting to be written by flush_config() and the timer that will write it
+        self._config_pending: dict[str, Any] | None = None
+        self._config_save_timer: threading.Timer | None = None
+        self._config_lock = threading.Lock()
+
+        # (expiration time, result) of the last call to tools_installed()
+        self._tools_installed_cache: tuple[float, bool] | None = None
+
         # set the icon to a PNG file in the current directory
         # this immediately updates the menu bar icon
         # py2app will place the icon in the app bundle Resources folder
@@ -165,18 +323,55 @@ class Locationator(rumps.App):
         # load config from plist file and init menu state
         self.load_config()
 
+        # general pasteboard used to return results from the Services menu
+        self.pasteboard = Pasteboard()
+
         # initialize Location Services
-        self.location_manager = CLLocationManager.alloc().init()
-        self.location_manager.setDelegate_(self)
+        self.location_manager = self.location_manager_for(self)
+        # authorization status, updated by locationManagerDidChangeAuthorization_()
+        self._auth_status = self.location_manager.authorizationStatus()
+
+        # cache of reverse geocode results shared by the menu, Services, and server
+        self._geocode_cache = GeocodeCache(
+            maxsize=GEOCODE_CACHE_SIZE, ttl=GEOCODE_CACHE_TTL, path=GEOCODE_CACHE_FILE
+        )
+
+        # shared geocoder; CLGeocoder only runs one request at a time so it is only
+        # used from the geocoder thread, see reverse_geocode_future()
+        self._geocoder = CLGeocoder.alloc().init()
+        self._geocoder_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="geocoder"
+        )
+        # futures for reverse geocode requests in progress keyed on GeocodeCache.key()
+        # so concurrent requests for the same location share a single lookup
+        self._geocode_in_flight: dict[
+            tuple[float, float], concurrent.futures.Future
+        ] = {}
+        # number of callers waiting on each in-flight future, see cancel_reverse_geocode()
+        self._geocode_waiters: dict[tuple[float, float], int] = {}
+        self._geocode_in_flight_lock = threading.Lock()
 
         # will hold last location and datetime of request
         self._location = LocationResult()
-        # allow only one location request to execute at a time
-        self._location_request_in_progress = False
+        # held while a location request is in progress to allow only one location
+        # request to execute at a time; acquired by requestLocation() and released
+        # by the location delegate methods when the request completes
+        self._location_request_semaphore = threading.BoundedSemaphore(1)
+        # set when no location request is in progress; cleared by requestLocation()
+        # and set by the location delegate methods when the request completes
+        self._location_ready = threading.Event()
+        self._location_ready.set()
+        # run loop of the main thread if it is waiting for the location request to complete
+        self._location_run_loop = None
 
         # authorize Location Services if needed
         self.authorize()
 
+        # queued on the geocoder thread before the server starts so no request
+        # can be queued ahead of it; a request that arrives while it runs waits
+        # at most GEOCODE_WARMUP_TIMEOUT seconds
+        self._geocoder_executor.submit(self._warm_geocoder)
+
         # start the HTTP server
         self.start_server()
 
@@ -186,29 +381,41 @@ class Locationator(rumps.App):
         # register the service provider with the Services menu
         NSApplication.sharedApplication().setServicesProvider_(self.service_provider)
 
+        # clean up however the app is terminated, not just from the Quit menu
+        self._shut_down = False
+        rumps.events.before_quit.register(self.shutdown)
+
+    @classmethod
+    def location_manager_for(cls, delegate: Locationator) -> CLLocationManager:
+        """Return the shared CLLocationManager with delegate set as its delegate
+
+        The manager is created the first time this is called and reused after that
+        so an app that is created again doesn't leave another manager behind.
+        """
+        if cls._shared_location_manager is None:
+            cls._shared_location_manager = CLLocationManager.alloc().init()
+        cls._shared_location_manager.setDelegate_(delegate)
+        return cls._shared_location_manager
+
     def authorize(self):
         """Request authorization for Location Services"""
         self.location_manager.requestAlwaysAuthorization()
 
     def locationManagerDidChangeAuthorization_(self, manager):
         """Called when authorization status changes"""
-        self.log(f"authorization status changed: {manager.authorizationStatus()}")
+        self._auth_status = manager.authorizationStatus()
+        self.log("authorization status changed: %s", self._auth_status)
 
     def on_auth_status(self, sender):
         """Display dialog with authorization status"""
-        status = self.location_manager.authorizationStatus()
-        status_str = AUTH_STATUS.get(status, "Unknown")
-        enable_str = ""
-        if status not in (
-            kCLAuthorizationStatusAuthorized,
-            kCLAuthorizationStatusAuthorizedAlways,
-        ):
-            enable_str = f"\n\nTo enable Location Services, go to "
-            "System Preferences > Security & Privacy > Privacy > Location Services"
-            "and check the box next to {APP_NAME}."
+        status = self._auth_status
         rumps.alert(
-            title=f"Authorization status",
-            message=f"{APP_NAME} {__version__}\nauthorization status: {status_str} ({status}){enable_str}",
+            title=AUTH_STATUS_TITLE,
+            message=AUTH_STATUS_MESSAGE.format(
+                status_str=AUTH_STATUS.get(status, "Unknown"),
+                status=status,
+                enable_str="" if status in AUTH_STATUS_AUTHORIZED else AUTH_ENABLE_HINT,
+            ),
             ok="OK",
         )
 
@@ -224,7 +431,7 @@ class Locationator(rumps.App):
             target=run_server, args=[self, self.port, REVERSE_GEOCODE_TIMEOUT]
         )
         self.server_thread.start()
-        self.log(f"start_server done: {self.server_thread}")
+        self.log("start_server done: %s", self.server_thread)
 
     def on_reverse_geocode(self, sender):
         """Perform reverse geocode of user-supplied latitude/longitude"""
@@ -239,25 +446,6 @@ class Locationator(rumps.App):
         ).run()
 
         if result.clicked:
-
-            def _geocode_completion_handler(placemarks, error):
-                """Handle completion of reverse geocode"""
-                self.log(f"geocode_completion_handler: {placemarks}")
-                if error:
-                    rumps.alert(
-                        title="Reverse Geocode Error",
-                        message=f"{APP_NAME} {__version__} reverse geocode error: {error}",
-                        ok="OK",
-                    )
-                else:
-                    placemark = placemarks[0]
-                    placemark_dict = placemark_to_dict(placemark)
-                    rumps.alert(
-                        title="Reverse Geocode Result",
-                        message=format_result_dict(placemark_dict),
-                        ok="OK",
-                    )
-
             try:
                 lat, lng = get_lat_long_from_string(result.text)
             except ValueError as e:
@@ -267,61 +455,87 @@ class Locationator(rumps.App):
                     ok="OK",
                 )
                 return
-            self.log(f"on_reverse_geocode: {lat}, {lng}")
-            geocoder = CLGeocoder.alloc().init()
-            location = CLLocation.alloc().initWithLatitude_longitude_(
-                float(lat), float(lng)
+            self.log("on_reverse_geocode: %s, %s", lat, lng)
+            future = self.reverse_geocode_future(lat, lng)
+            future.add_done_callback(
+                lambda f: AppHelper.callAfter(self._on_reverse_geocode_done, f)
             )
-            geocoder.reverseGeocodeLocation_completionHandler_(
-                location, _geocode_completion_handler
+
+    def _on_reverse_geocode_done(self, future: concurrent.futures.Future):
+        """Display result of reverse geocode started by on_reverse_geocode on the main thread"""
+        success, result = future.result()
+        if success:
+            rumps.alert(
+                title="Reverse Geocode Result",
+                message=format_result_dict(result),
+                ok="OK",
+            )
+        else:
+            rumps.alert(
+                title="Reverse Geocode Error",
+                message=f"{APP_NAME} {__version__} reverse geocode error: {result}",
+                ok="OK",
             )
 
     def on_current_location(self, sender):
-        """Request current location from Location Services"""
-        try:
-            location = self.update_current_location()
-            self.log(f"on_current_location: {location}")
-            if location.error:
-                rumps.alert(f"Error getting current location:\n{location.error}")
-            else:
-                rumps.alert(f"Current location:\n{location.location.as_str()}")
-        except LocationRequestError as e:
-            rumps.alert(f"Error getting current location:\n{e}")
+        """Request current location from Location Services
+
+        The request is made in a background thread and the result is displayed
+        when it completes so the menu bar isn't blocked while waiting for the location.
+        """
+
+        def _request_location():
+            try:
+                location = self.update_current_location()
+                error = location.error
+            except LocationRequestError as e:
+                location = None
+                error = e
+            AppHelper.callAfter(self._on_current_location_done, location, error)
+
+        threading.Thread(target=_request_location, daemon=True).start()
+
+    def _on_current_location_done(
+        self, location: LocationResult | None, error: Exception | str | None
+    ):
+        """Display result of location request started by on_current_location on the main thread"""
+        self.log("on_current_location: %s", location)
+        if error:
+            rumps.alert(f"Error getting current location:\n{error}")
+        else:
+            rumps.alert(f"Current location:\n{location.location.as_str()}")
 
     def on_install_remove_tools(self, sender):
         """Install or remove the command line tools"""
         if sender.title.startswith("Install"):
-            if self.install_tools():
-                sender.title = REMOVE_TOOLS_TITLE
-                self.config["tools_installed"] = True
-                self.save_config()
-        elif self.remove_tools():
-            sender.title = INSTALL_TOOLS_TITLE
-            self.config["tools_installed"] = False
-            self.save_config()
+            self.install_tools()
+        else:
+            self.remove_tools()
+
+    def install_tools(self) -> bool:
+        """Install the command line tools, located in Resources folder of app to /usr/local/bin
+
+        Returns: True if the install was started, False if the user cancelled
 
-    def install_tools(self):
-        """Install the command line tools, located in Resources folder of app to /usr/local/bin"""
+        Note: The install runs in the background; the menu and config are updated when it completes.
+        """
         self.log("on_install_tools")
 
         # create commands to install tools
         commands = []
         if not pathlib.Path(TOOLS_INSTALL_PATH).exists():
-            commands.append(f"sudo mkdir -p {TOOLS_INSTALL_PATH}")
+            commands.append(f"mkdir -p {TOOLS_INSTALL_PATH}")
         app_path = get_app_path()
         src = shlex.quote(f"{app_path}/Contents/Resources/{CLI_NAME}")
-        commands.append(f"sudo ln -s {src} {TOOLS_INSTALL_PATH}/{CLI_NAME}")
-        command_str = f"osascript -e 'do shell script \"{' && '.join(commands)}\" with administrator privileges'"
-        self.log(f"install command: {command_str}")
+        commands.append(f"ln -s {src} {TOOLS_INSTALL_PATH}/{CLI_NAME}")
+        command_str = " && ".join(commands)
+        self.log("install command: %s", command_str)
 
-        command_word = "command" if len(commands) == 1 else "commands"
         message = (
             f"{APP_NAME} includes a command line tool, {CLI_NAME}, for performing reverse geocoding. "
             "To use it, the tool must be installed in your path. "
-            f"When you press OK, the following {command_word} will be copied to the clipboard; "
-            f"you will need to paste this in a terminal window and hit Return to run the {command_word}:\n\n"
-            f"{command_str}\n\n"
-            "\nYou may be prompted for your admin password."
+            f"When you press OK, the tool will be installed in {TOOLS_INSTALL_PATH}."
+            "\n\nYou will be prompted for your admin password."
         )
 
         if (
@@ -336,82 +550,133 @@ class Locationator(rumps.App):
             self.log("user cancelled install")
             return False
 
-        pasteboard = Pasteboard()
-        pasteboard.set_text(command_str)
-
-        message = (
-            f"Paste the {command_word} from the clipboard to a terminal window and press Return to run them. "
-            "The clipboard contains the following:\n\n"
-            f"{command_str}\n\n"
-            "You may be prompted for your admin password. "
-            "Press OK when done."
-        )
-
-        rumps.alert(
-            "Install command line tools",
-            message,
-            "OK",
+        self._run_with_administrator_privileges(
+            command_str, self._on_install_tools_done
         )
+        return True
 
-        if self.tools_installed():
+    def _on_install_tools_done(self, error: str | None):
+        """Called on the main thread when the install command completes"""
+        if self.tools_installed(refresh=True):
             self.log("on_install_tools done")
+            self._set_tools_installed(True)
             message = (
                 "You can now use the command line tool to perform reverse geocoding. "
                 f"Run {TOOLS_INSTALL_PATH}/{CLI_NAME} --help for more information."
             )
             rumps.alert("Command line tool installed", message)
-            return True
         else:
-            self.log("on_install_tools failed")
-            rumps.alert("Command line tool was not installed")
-            return False
+            self.log_error("on_install_tools failed: %s", error)
+            rumps.alert("Command line tool was not installed", error or "")
 
     def remove_tools(self) -> bool:
-        """Remove command line tools"""
+        """Remove command line tools
+
+        Returns: True if the removal was started, False if the user cancelled
+
+        Note: The removal runs in the background; the menu and config are updated when it completes.
+        """
         self.log("on_remove_tools")
 
-        command = f"sudo rm {TOOLS_INSTALL_PATH}/{CLI_NAME}"
-        command_str = f"osascript -e 'do shell script \"{command}\" with administrator privileges'"
-        self.log(f"remove command: {command_str}")
+        command_str = f"rm {TOOLS_INSTALL_PATH}/{CLI_NAME}"
+        self.log("remove command: %s", command_str)
 
         message = (
-            "When you press OK, the following command will be copied to the clipboard:\n\n"
-            f"{command_str}\n\n"
-            "You will need to paste this command into a terminal window and hit Return to run it. "
-            "You may be prompted for your admin password."
+            f"When you press OK, the command line tool will be removed from {TOOLS_INSTALL_PATH}."
+            "\n\nYou will be prompted for your admin password."
         )
         if rumps.alert("Remove command line tools", message, "OK", "Cancel") != 1:
             self.log("user cancelled remove")
             return False
 
-        pasteboard = Pasteboard()
-        pasteboard.set_text(command_str)
-
-        message = (
-            "Paste the command from the clipboard to a terminal window and press Return to run it. "
-            "The clipboard contains the following:\n\n"
-            f"{command_str}\n\n"
-            "You may be prompted for your admin password. "
-            "Press OK when done."
+        self._run_with_administrator_privileges(
+            command_str, self._on_remove_tools_done
         )
-        rumps.alert("Remove command line tools", message, "OK")
+        return True
 
-        if self.tools_installed():
-            self.log("on_remove_tools failed")
-            rumps.alert(f"Command line tool was not removed")
-            return False
+    def _on_remove_tools_done(self, error: str | None):
+        """Called on the main thread when the remove command completes"""
+        if self.tools_installed(refresh=True):
+            self.log_error("on_remove_tools failed: %s", error)
+            rumps.alert("Command line tool was not removed", error or "")
         else:
             self.log("on_remove_tools done")
+            self._set_tools_installed(False)
             rumps.alert("Command line tool removed")
 
-        self.log("on_remove_tools done")
-        return True
+    def _set_tools_installed(self, installed: bool):
+        """Update the menu and config to reflect whether the command line tools are installed"""
+        self._set_tools_installed_cache(installed)
+        self._update_tools_menu(installed)
+        self.config["tools_installed"] = installed
+        self.save_config()
+
+    def _update_tools_menu(self, installed: bool):
+        """Set the install/remove tools menu title; the menu item is only updated if the title changes"""
+        title = REMOVE_TOOLS_TITLE if installed else INSTALL_TOOLS_TITLE
+        if self.menu_install_tools.title != title:
+            self.menu_install_tools.title = title
 
-    def tools_installed(self) -> bool:
-        """Return True if command line tools installed"""
+    def _run_with_administrator_privileges(
+        self, command: str, callback: Callable[[str | None], None]
+    ):
+        """Run a shell command with administrator privileges in a background thread.
+
+        Args:
+            command: shell command to run; macOS prompts the user for an admin password
+            callback: called on the main thread with None if the command succeeded
+                or an error message if it failed
+        """
+        # escape the command for use in an AppleScript string
+        script_command = command.replace("\\", "\\\\").replace('"', '\\"')
+        script = f'do shell script "{script_command}" with administrator privileges'
+
+        def _run():
+            try:
+                proc = subprocess.run(
+                    ["osascript", "-e", script],
+                    capture_output=True,
+                    text=True,
+                    timeout=ADMIN_COMMAND_TIMEOUT,
+                )
+                error = (
+                    (proc.stderr.strip() or "Unknown error") if proc.returncode else None
+                )
+            except (OSError, subprocess.SubprocessError) as e:
+                error = str(e)
+            AppHelper.callAfter(callback, error)
+
+        threading.Thread(target=_run, daemon=True).start()
+
+    def tools_installed(self, refresh: bool = False) -> bool:
+        """Return True if command line tools installed
+
+        Args:
+            refresh: if True, ignore the cached result
+
+        Note: The result is cached for TOOLS_INSTALLED_CACHE_TTL seconds.
+        """
+        now = time.monotonic()
+        if (
+            not refresh
+            and self._tools_installed_cache
+            and self._tools_installed_cache[0] > now
+        ):
+            return self._tools_installed_cache[1]
         install_path = TOOLS_INSTALL_PATH
         # use os.path instead of pathlib because pathlib may raise PermissionError
-        return os.path.exists(os.path.join(install_path, CLI_NAME))
+        # lexists so a link left dangling by moving the app still counts as installed
+        # as it must be removed before the tool can be installed again
+        installed = os.path.lexists(os.path.join(install_path, CLI_NAME))
+        self._set_tools_installed_cache(installed)
+        return installed
+
+    def _set_tools_installed_cache(self, installed: bool):
+        """Cache the result of tools_installed() for TOOLS_INSTALLED_CACHE_TTL seconds"""
+        self._tools_installed_cache = (
+            time.monotonic() + TOOLS_INSTALLED_CACHE_TTL,
+            installed,
+        )
 
     def reverse_geocode(self, latitude: float, longitude: float) -> dict[str, Any]:
         """Perform reverse geocode of latitude/longitude
@@ -424,174 +689,468 @@ class Locationator(rumps.App):
 
         Raises: ReverseGeocodeError if reverse geocode fails
 
-        Note: This method may block for up to LOCATION_TIMEOUT seconds
+        Note: This method may block for up to REVERSE_GEOCODE_TIMEOUT seconds
         while waiting for the reverse geocode to complete.
+        Results are cached so repeated requests for the same location return immediately.
         """
+        return self._reverse_geocode_result(
+            self.reverse_geocode_future(latitude, longitude)
+        )
 
-        class ReverseGeocodeResult:
-            """Simple class to hold the result for the completion handler"""
+    def reverse_geocode_many(
+        self,
+        locations: list[tuple[float, float]],
+        timeout: float = REVERSE_GEOCODE_TIMEOUT * 2,
+    ) -> list[dict[str, Any] | ReverseGeocodeError]:
+        """Perform reverse geocode of a list of (latitude, longitude) tuples
 
-            def __init__(self):
-                self.data = {}
-                self.error = None
-                self.done = False
+        Args:
+            locations: list of (latitude, longitude) tuples to reverse geocode
+            timeout: seconds to wait for each request after the previous one completed;
+                the geocoder thread handles requests one at a time
+
+        Returns: list containing the reverse geocode result dict or the ReverseGeocodeError
+            for each location, in the same order as locations
+
+        Note: All requests are started before waiting on any of them so cached results and
+        duplicate locations are returned without waiting for the other requests.
+        Once a request times out, it and the requests that haven't completed are cancelled
+        so the geocoder isn't kept busy with requests no one is waiting for; later requests
+        would have to wait behind them.
+        """
+        futures = [
+            self.reverse_geocode_future(latitude, longitude)
+            for latitude, longitude in locations
+        ]
+        results = []
+        timed_out = False
+        for future in futures:
+            if timed_out and not future.done():
+                self.cancel_reverse_geocode(future)
+                results.append(
+                    ReverseGeocodeError("Timeout waiting for reverse geocode")
+                )
+                continue
+            try:
+                results.append(self._reverse_geocode_result(future, timeout))
+            except ReverseGeocodeError as e:
+                if not future.done():
+                    timed_out = True
+                    self.cancel_reverse_geocode(future)
+                results.append(e)
+        return results
+
+    def _reverse_geocode_result(
+        self,
+        future: concurrent.futures.Future,
+        timeout: float = REVERSE_GEOCODE_TIMEOUT * 2,
+    ) -> dict[str, Any]:
+        """Wait for a future returned by reverse_geocode_future and return its result
 
-            def __str__(self):
-                return f"ReverseGeocodeResult(data={self.data}, error={self.error}, done={self.done})"
+        Args:
+            future: Future returned by reverse_geocode_future
+            timeout: seconds to wait for the result
 
-        result = ReverseGeocodeResult()
+        Raises: ReverseGeocodeError if reverse geocode fails or times out
+        """
+        if threading.current_thread() is threading.main_thread():
+            # the geocoder's completion handler runs on the main thread so
+            # blocking on the future here would deadlock; instead run the run loop
+            # until the future is done
+            run_loop = CFRunLoopGetCurrent()
+            future.add_done_callback(lambda _: CFRunLoopStop(run_loop))
+            if not self._run_loop_until(future.done, timeout):
+                raise ReverseGeocodeError("Timeout waiting for reverse geocode")
+        try:
+            success, result = future.result(timeout=timeout)
+        except concurrent.futures.TimeoutError as e:
+            raise ReverseGeocodeError("Timeout waiting for reverse geocode") from e
+        self.log_debug("reverse_geocode done: success=%r, result=%r", success, result)
+        if not success:
+            raise ReverseGeocodeError(result)
+        return result
+
+    def cached_reverse_geocode_json(
+        self, latitude: float, longitude: float
+    ) -> bytes | None:
+        """Return the cached reverse geocode result for latitude/longitude encoded as JSON
+
+        Returns: UTF-8 encoded JSON or None if the result is not cached
+        """
+        return self._geocode_cache.get_json(latitude, longitude)
 
-        with objc.autorelease_pool():
+    def reverse_geocode_future(
+        self, latitude: float, longitude: float, use_cache: bool = True
+    ) -> concurrent.futures.Future:
+        """Start reverse geocode of latitude/longitude without waiting for it to complete.
 
-            def _geocode_completion_handler(placemarks, completion_error):
-                """Handle completion of reverse geocode"""
-                nonlocal result
-                self.log(f"geocode_completion_handler: {placemarks}")
-                if completion_error:
-                    result.error = completion_error
-                else:
-                    placemark = placemarks[0]
-                    result.data = placemark_to_dict(placemark)
-                result.done = True
-                self.log(f"geocode_completion_handler done: {result=}")
-
-            geocoder = CLGeocoder.alloc().init()
-            location = CLLocation.alloc().initWithLatitude_longitude_(
-                float(latitude), float(longitude)
-            )
-            geocoder.reverseGeocodeLocation_completionHandler_(
-                location, _geocode_completion_handler
-            )
+        Args:
+            latitude: latitude to reverse geocode
+            longitude: longitude to reverse geocode
+            use_cache: if False, don't return a cached result; the new result is still cached
+
+        Returns: Future which resolves to a tuple of (success, result) where result is
+            the reverse geocode result dict if success is True otherwise an error message
 
-            start_t = time.monotonic_ns()
-            timeout = REVERSE_GEOCODE_TIMEOUT * 1e9  # convert to nanoseconds
-            while not result.done:
-                # wait for completion handler to set result.done
-                # use NSRunLoop to allow other events to be processed
-                # I tried this with using a threading.Event() and queue.Queue()
-                # as in the server but it blocked the run loop
-                NSRunLoop.currentRunLoop().runUntilDate_(
-                    NSDate.dateWithTimeIntervalSinceNow_(WAIT_INTERVAL)
+        Note: Concurrent requests for the same location (as determined by GeocodeCache.key())
+        share the future of the request already in progress.
+        Requests are run one at a time by the geocoder thread.
+        """
+        self.log_debug("reverse_geocode_future: %s, %s", latitude, longitude)
+        if use_cache and (cached := self._geocode_cache.get(latitude, longitude)):
+            self.log_debug("reverse_geocode cache hit: %s, %s", latitude, longitude)
+            future = concurrent.futures.Future()
+            future.set_result((True, cached))
+            return future
+
+        key = GeocodeCache.key(latitude, longitude)
+        with self._geocode_in_flight_lock:
+            if in_flight := self._geocode_in_flight.get(key):
+                self.log_debug(
+                    "reverse_geocode in progress: %s, %s", latitude, longitude
                 )
-                if time.monotonic_ns() - start_t > timeout:
-                    self.log("timeout waiting for reverse geocode")
-                    raise ReverseGeocodeError("Timeout waiting for reverse geocode")
+                self._geocode_waiters[key] += 1
+                return in_flight
+            future = self._geocoder_executor.submit(
+                self._reverse_geocode_on_geocoder_thread, latitude, longitude, key
+            )
+            self._geocode_in_flight[key] = future
+            self._geocode_waiters[key] = 1
+        return future
 
-            self.log(f"reverse_geocode done: {result=}")
+    def cancel_reverse_geocode(self, future: concurrent.futures.Future):
+        """Cancel a request started by reverse_geocode_future() whose result is no longer needed.
 
-            if result.error:
-                raise ReverseGeocodeError(result.error)
-            return result.data
+        Args:
+            future: Future returned by reverse_geocode_future()
 
-    def reverse_geocode_with_queue(
-        self, latitude: float, longitude: float, geocode_queue: queue.Queue
-    ):
-        """Perform reverse geocode of latitude/longitude; return result via queue"""
-        self.log(f"reverse_geocode: {latitude}, {longitude}")
-        with objc.autorelease_pool():
-            geocoder = CLGeocoder.alloc().init()
-            location = CLLocation.alloc().initWithLatitude_longitude_(
-                latitude, longitude
-            )
+        Note: The request is only cancelled once no other caller is waiting on the same
+        future. A request the geocoder thread has already started is not interrupted
+        but it won't be retried.
+        """
+        with self._geocode_in_flight_lock:
+            for key, in_flight in self._geocode_in_flight.items():
+                if in_flight is future:
+                    break
+            else:
+                # already finished or was a cache hit
+                return
+            self._geocode_waiters[key] -= 1
+            if self._geocode_waiters[key] > 0:
+                return
+            if future.cancel():
+                # the geocoder thread skips cancelled futures so it won't remove it
+                self.log("reverse_geocode cancelled: %s", key)
+                del self._geocode_in_flight[key]
+                del self._geocode_waiters[key]
+
+    def _reverse_geocode_on_geocoder_thread(
+        self, latitude: float, longitude: float, key: tuple[float, float]
+    ) -> tuple[bool, dict[str, Any] | str]:
+        """Reverse geocode latitude/longitude with the shared geocoder and wait for the result.
 
-            placemark_dict = {}
-            error_str = None
+        Args:
+            latitude: latitude to reverse geocode
+            longitude: longitude to reverse geocode
+            key: GeocodeCache.key() of latitude/longitude
 
-            def geocode_completion_handler(placemarks, error):
-                """Completion handler for reverse geocode"""
-                nonlocal placemark_dict
-                nonlocal error_str
+        Returns: tuple of (success, result) where result is the reverse geocode result dict
+            if success is True otherwise an error message
 
-                self.log(f"geocode_completion_handler: {placemarks=}, {error=}")
-                if error:
-                    # return error message as JSON
-                    self.log(f"geocode_completion_handler error: {error}")
-                    error_str = str(error)
-                    geocode_queue.put((False, error_str))
-                    return
+        Note: This runs on the geocoder thread so only one request is sent to the
+        shared CLGeocoder at a time. The completion handler is called on the main thread
+        but the placemark is converted to a dict here so the main thread isn't held up.
+        """
+        try:
+            for attempt in range(GEOCODE_MAX_RETRIES + 1):
+                if attempt:
+                    with self._geocode_in_flight_lock:
+                        abandoned = not self._geocode_waiters.get(key)
+                    if abandoned:
+                        self.log("reverse geocode abandoned, not retrying")
+                        return False, "Reverse geocode cancelled"
+                    delay = min(
+                        GEOCODE_RETRY_DELAY * 2 ** (attempt - 1),
+                        GEOCODE_RETRY_MAX_DELAY,
+                    )
+                    delay += random.uniform(0, delay / 2)
+                    self.log(
+                        "retrying reverse geocode in %.2f seconds (attempt %s)",
+                        delay,
+                        attempt,
+                    )
+                    time.sleep(delay)
+                success, result, retryable = self._reverse_geocode_once(
+                    latitude, longitude
+                )
+                if success or not retryable:
+                    break
+            if not success:
+                return False, result
+            # cache before removing from in-flight so later requests hit the cache
+            self._geocode_cache.set(latitude, longitude, result)
+            return True, result
+        finally:
+            with self._geocode_in_flight_lock:
+                self._geocode_in_flight.pop(key, None)
+                self._geocode_waiters.pop(key, None)
+
+    def _warm_geocoder(self):
+        """Reverse geocode GEOCODE_WARMUP_LOCATION and discard the result.
+
+        Note: This runs on the geocoder thread at launch so the first real request
+        isn't slowed by CoreLocation's one-time setup. The result is not cached and
+        the request is not retried.
+        """
+        success, result, _ = self._reverse_geocode_once(
+            *GEOCODE_WARMUP_LOCATION, timeout=GEOCODE_WARMUP_TIMEOUT
+        )
+        self.log_debug("warm geocoder: success=%r, result=%r", success, result)
+
+    def _reverse_geocode_once(
+        self,
+        latitude: float,
+        longitude: float,
+        timeout: float = REVERSE_GEOCODE_TIMEOUT,
+    ) -> tuple[bool, dict[str, Any] | str, bool]:
+        """Send a single reverse geocode request to the shared geocoder and wait for the result.
+
+        Args:
+            latitude: latitude to reverse geocode
+            longitude: longitude to reverse geocode
+            timeout: seconds to wait for the result before cancelling the request
 
-                placemark = placemarks.objectAtIndex_(0)
-                placemark_dict = placemark_to_dict(placemark)
-                self.log(f"geocode_completion_handler done: {placemark_dict=}")
-                geocode_queue.put((True, json.dumps(placemark_dict)))
-                self.log(f"geocode_completion_handler done: {geocode_queue=}")
+        Returns: tuple of (success, result, retryable) where result is the reverse geocode
+            result dict if success is True otherwise an error message and retryable is True
+            if the request failed with an error that may succeed if retried
+        """
+        result = {}
+        done = threading.Event()
+
+        def _geocode_completion_handler(placemarks, error):
+            """Handle completion of reverse geocode"""
+            self.log_debug(
+                "geocode_completion_handler: placemarks=%r, error=%r",
+                placemarks,
+                error,
+            )
+            # this is called on the main thread, which also runs the menu bar,
+            # so only hand off the result; it's converted on the geocoder thread
+            if error:
+                result["error"] = error
+            else:
+                result["placemark"] = placemarks.objectAtIndex_(0)
+            done.set()
 
-            # start the request then wait for completion
-            geocoder.reverseGeocodeLocation_completionHandler_(
-                location, geocode_completion_handler
+        with objc.autorelease_pool():
+            location = CLLocation.alloc().initWithLatitude_longitude_(
+                float(latitude), float(longitude)
+            )
+            self._geocoder.reverseGeocodeLocation_completionHandler_(
+                location, _geocode_completion_handler
             )
-            self.log(f"reverse_geocode done: {geocode_queue=}")
+        if not done.wait(timeout):
+            self.log("timeout waiting for reverse geocode")
+            # cancel so the geocoder is free for the next request
+            self._geocoder.cancelGeocode()
+            return False, "Timeout waiting for reverse geocode", False
+        if error := result.get("error"):
+            # CoreLocation reports throttling of requests as a network error
+            retryable = (
+                error.domain() == kCLErrorDomain and error.code() == kCLErrorNetwork
+            )
+            return False, str(error), retryable
+        # release the objects created converting the result as soon as it's done
+        with objc.autorelease_pool():
+            return True, placemark_to_dict(result["placemark"]), False
 
     def update_current_location(self, accuracy: float | None = None) -> LocationResult:
         """Request the current location and set self._location"""
-        self.log("update_current_location: starting request")
-        if accuracy is not None:
-            self.location_manager.setDesiredAccuracy_(accuracy)
-        else:
-            self.location_manager.setDesiredAccuracy_(kCLLocationAccuracyBest)
-        self.log(f"update_current_location: starting request, {accuracy=}")
-        self.requestLocation()
-        start_t = time.monotonic_ns()
-        timeout = LOCATION_REQUEST_TIMEOUT * 1e9  # convert to nanoseconds
-        while self._location_request_in_progress:
-            # wait for request to finish
-            # use NSRunLoop to allow other events to be processed
-            # I tried this with using a threading.Event()
-            # as in the server but it blocked the run loop
-            NSRunLoop.currentRunLoop().runUntilDate_(
-                NSDate.dateWithTimeIntervalSinceNow_(WAIT_INTERVAL)
-            )
-            if time.monotonic_ns() - start_t > timeout:
-                self.log("timeout waiting for current location")
-                raise LocationRequestError("Timeout waiting for location request")
-        if self._location.error or not self._location.location:
-            self.log(f"Error getting location: {self._location}")
-            raise LocationRequestError(f"Error getting location: {self._location}")
-        self.log(f"update_current_location: {self._location}")
-        return self._location
-
-    def current_location_with_queue(
-        self, location_queue: queue.Queue, accuracy: float | None = None
-    ):
-        """Perform current location lookup; return result via queue"""
-        self.log(f"current_location_with_queue: {location_queue=}")
-        location = None
+        self.log_debug("update_current_location: starting request")
+        on_main_thread = threading.current_thread() is threading.main_thread()
         with objc.autorelease_pool():
-            try:
-                location = self.update_current_location(accuracy=accuracy)
-            except LocationRequestError as e:
-                self.log(f"current_location_with_queue error: {e}")
-                error_str = str(e)
+            if accuracy is not None:
+                self.location_manager.setDesiredAccuracy_(accuracy)
             else:
-                error_str = location.error
-            location_dict = (
-                location.location.asdict() if location and location.location else {}
+                self.location_manager.setDesiredAccuracy_(kCLLocationAccuracyBest)
+            self.log_debug(
+                "update_current_location: starting request, accuracy=%r", accuracy
             )
-            location_dict["error"] = error_str
-
-            def _default(obj):
-                if isinstance(obj, datetime.datetime):
-                    return obj.isoformat()
-                raise TypeError(
-                    f"Object of type {obj.__class__.__name__} is not JSON serializable"
+            if on_main_thread:
+                # the location delegate stops this run loop when the request finishes
+                self._location_run_loop = CFRunLoopGetCurrent()
+            if not self.requestLocation():
+                # share the result of the request already in progress
+                self.log_debug(
+                    "update_current_location: waiting for request in progress"
                 )
+            # hold on to the result for this request; once it finishes another
+            # caller may start a new request which replaces self._location
+            result = self._location
 
-            if error := location_dict["error"]:
-                location_queue.put((False, error))
-            else:
-                location_queue.put((True, json.dumps(location_dict, default=_default)))
-            self.log(
-                f"current_location_with_queue done: {location_queue=} {location_dict=}"
-            )
+        def is_done() -> bool:
+            return self._location_ready.is_set() or self._location is not result
+
+        if on_main_thread:
+            # the location delegate methods are called on the main thread so
+            # blocking on the event here would deadlock; instead run the run loop
+            done = self._run_loop_until(is_done, LOCATION_REQUEST_TIMEOUT)
+        else:
+            done = self._location_ready.wait(LOCATION_REQUEST_TIMEOUT) or is_done()
+        if not done:
+            self.log("timeout waiting for current location")
+            self._cancel_location_request(result)
+            raise LocationRequestError("Timeout waiting for location request")
+        if result.error or not result.location:
+            self.log_error("Error getting location: %s", result)
+            raise LocationRequestError(f"Error getting location: {result}")
+        self.log_debug("update_current_location: %s", result)
+        return result
+
+    def _run_loop_until(self, is_done: Callable[[], bool], timeout: float) -> bool:
+        """Run the current thread's run loop until is_done() returns True or timeout expires.
+
+        Args:
+            is_done: callable that returns True when the wait is complete
+            timeout: maximum time to wait in seconds
+
+        Returns: True if is_done() returned True, False if the timeout expired
+
+        Note: This is only needed on the main thread, which must keep running its run loop
+        for CoreLocation completion handlers and delegate methods to be called.
+        Other threads should block on a threading.Event or Future set by the callback.
+        Callbacks that complete the wait should call CFRunLoopStop() on the
+        waiting thread's run loop so this returns immediately instead of waking
+        up periodically to poll is_done().
+        """
+        deadline = time.monotonic() + timeout
+        while not is_done():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            # drain objects autoreleased by the run loop on each iteration
+            # instead of holding them until the wait completes
+            with objc.autorelease_pool():
+                run_result = CFRunLoopRunInMode(kCFRunLoopDefaultMode, remaining, False)
+            if run_result == kCFRunLoopRunFinished:
+                # run loop has no input sources (e.g. not the main thread)
+                # so it returns immediately; avoid spinning
+                time.sleep(WAIT_INTERVAL)
+        return True
+
+    def current_location_future(
+        self, accuracy: float | None = None
+    ) -> concurrent.futures.Future:
+        """Perform current location lookup
+
+        Args:
+            accuracy: desired accuracy of the location or None for best accuracy
+
+        Returns: Future which resolves to a tuple of (success, result) where result is
+            the location dict if success is True otherwise an error message
+
+        Note: The lookup runs on the calling thread so the returned future is already resolved.
+        """
+        self.log("current_location_future: accuracy=%r", accuracy)
+        future = concurrent.futures.Future()
+        location = None
+        try:
+            location = self.update_current_location(accuracy=accuracy)
+        except LocationRequestError as e:
+            self.log_error("current_location_future error: %s", e)
+            error_str = str(e)
+        else:
+            error_str = location.error
+        location_dict = (
+            location.location.asdict() if location and location.location else {}
+        )
+        location_dict["error"] = error_str
+
+        if error := location_dict["error"]:
+            future.set_result((False, error))
+        else:
+            future.set_result((True, location_dict))
+        self.log("current_location_future done: location_dict=%r", location_dict)
+        return future
+
+    def _init_logging(self):
+        """Set up self._logger to log to the unified log and, if debug is enabled, LOG_FILE.
+
+        Records are queued and written by a LogQueueListener thread which
+        flushes the log file once it has written all queued records.
+        The log file is created in the Application Support folder the first time a record is
+        written to it; see _set_debug() to enable or disable logging to the file.
+        """
+        self._logger = logging.getLogger(APP_NAME)
+        self._logger.propagate = False
+
+        nslog_handler = NSLogHandler()
+        nslog_handler.setFormatter(logging.Formatter(LOG_PREFIX + "%(message)s"))
+        self._log_file_handler = BufferedFileHandler(
+            self._log_file_path,
+            encoding="utf-8",
+            delay=True,
+        )
+        self._log_file_handler.setFormatter(
+            logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
+        )
+        self._set_debug(self._debug)
+
+        log_queue = queue.SimpleQueue()
+        self._logger.handlers = [logging.handlers.QueueHandler(log_queue)]
+        # warnings logged by image_metadata go to the same handlers
+        image_metadata_logger.handlers = self._logger.handlers
+        image_metadata_logger.propagate = False
+        self._log_listener = LogQueueListener(
+            log_queue,
+            nslog_handler,
+            self._log_file_handler,
+            respect_handler_level=True,
+        )
+        self._log_listener.start()
+
+    def _set_debug(self, debug: bool):
+        """Enable or disable debug logging to LOG_FILE and messages logged with log_debug()"""
+        self._debug = debug
+        self._logger.setLevel(logging.DEBUG if debug else logging.INFO)
+        # rebind log_debug() so per-request logging costs a single call
+        # to the logger, or to a no-op when debug is disabled
+        self.log_debug = self._logger.debug if debug else log_noop
+        # the file handler is always attached; its level determines if anything is written
+        self._log_file_handler.setLevel(
+            logging.DEBUG if debug else logging.CRITICAL + 1
+        )
+
+    def log(self, msg: str, *args: Any):
+        """Log a message to unified log and, if debug is enabled, to LOG_FILE.
+
+        Args:
+            msg: message to log; if args are passed, a printf-style format string
+            *args: values for the format string; only formatted when the message is logged
+        """
+        self._logger.info(msg, *args)
+
+    def log_error(self, msg: str, *args: Any):
+        """Log an error message to unified log and, if debug is enabled, to LOG_FILE.
+
+        Args:
+            msg: message to log; if args are passed, a printf-style format string
+            *args: values for the format string; only formatted when the message is logged
+        """
+        self._logger.error(msg, *args)
+
+    def log_debug(self, msg: str, *args: Any):
+        """Log a message to unified log and LOG_FILE only if debug is enabled.
+
+        Use for frequent messages such as per-request logging in the server.
+        _set_debug() rebinds this on the instance to the logger's debug method or,
+        when debug is disabled, to log_noop() so the call does no work.
 
-    def log(self, msg: str):
-        """Log a message to unified log."""
-        NSLog(f"{APP_NAME} {__version__} {msg}")
-        # if debug set in config, also log to file
-        # file will be created in Application Support folder
-        if self._debug:
-            with self.open(LOG_FILE, "a", encoding="utf-8") as f:
-                f.write(f"{datetime.datetime.now().isoformat()} - {msg}\n")
+        Args:
+            msg: message to log; if args are passed, a printf-style format string
+            *args: values for the format string; only formatted when debug is enabled
+        """
+        self._logger.debug(msg, *args)
 
     def load_config(self):
         """Load config from plist file in Application Support folder.
@@ -604,57 +1163,116 @@ class Locationator(rumps.App):
         for storing structured data. JSON or another format could be used but I stuck with
         plist so that the config file could be easily edited manually if needed and that's
         what is expected by macOS apps.
+
+        The parsed config is cached and the file is only read again if it has changed.
         """
+        # make sure a pending save isn't read back as the old config
+        self.flush_config()
         self.config = {}
         with contextlib.suppress(FileNotFoundError):
-            with self.open(CONFIG_FILE, "rb") as f:
-                with contextlib.suppress(Exception):
-                    # don't crash if config file is malformed
-                    self.config = plistlib.load(f)
+            stat_key = self._config_stat_key()
+            if self._config_cache and self._config_cache[0] == stat_key:
+                self.config = dict(self._config_cache[1])
+            else:
+                with open(self._config_path, "rb") as f:
+                    data = f.read()
+                # don't crash if config file is empty or malformed
+                with contextlib.suppress(
+                    plistlib.InvalidFileException, ExpatError, ValueError
+                ):
+                    config = plistlib.loads(data) if data else {}
+                    if isinstance(config, dict):
+                        self.config = config
+                self._config_cache = (stat_key, dict(self.config))
+        loaded_config = dict(self.config)
         if not self.config:
             # file didn't exist or was malformed, create a new one
             # initialize config with default values
             self.config = {
                 "debug": False,
                 "port": SERVER_PORT,
-                "tools_installed": self.tools_installed(),
+                "tools_installed": self.tools_installed(refresh=True),
             }
-        self.log(f"loaded config: {self.config}")
+        self.log("loaded config: %s", self.config)
 
         # update the menu state to match the loaded config
-        self._debug = self.config.get("debug", False)
+        self._set_debug(self.config.get("debug", False))
         self.port = self.config.get("port", SERVER_PORT)
-        self.config["tools_installed"] = self.tools_installed()
-        self.menu_install_tools.title = (
-            INSTALL_TOOLS_TITLE
-            if not self.config["tools_installed"]
-            else REMOVE_TOOLS_TITLE
-        )
+        # the tool may have been installed or removed outside the app
+        self.config["tools_installed"] = self.tools_installed(refresh=True)
+        self._update_tools_menu(self.config["tools_installed"])
 
-        # save config because it may have been updated with default values
-        self.save_config()
+        # save config if it was updated with default values
+        self.config["debug"] = self._debug
+        self.config["port"] = self.port
+        if self.config != loaded_config:
+            self.save_config()
 
     def save_config(self):
         """Write config to plist file in Application Support folder.
 
         See docstring on load_config() for additional information.
+
+        The file is written CONFIG_SAVE_DELAY seconds later by a background timer
+        so a burst of changes is written once; call flush_config() to write it immediately.
         """
 
         self.config["debug"] = self._debug
         self.config["port"] = self.port
         self.config["tools_installed"] = self.tools_installed()
 
-        # self.config["start_on_login"] = self.start_on_login.state
-        with self.open(CONFIG_FILE, "wb+") as f:
-            plistlib.dump(self.config, f)
-        self.log(f"saved config: {self.config}")
+        with self._config_lock:
+            self._config_pending = dict(self.config)
+            if self._config_save_timer:
+                self._config_save_timer.cancel()
+            self._config_save_timer = threading.Timer(
+                CONFIG_SAVE_DELAY, self.flush_config
+            )
+            self._config_save_timer.daemon = True
+            self._config_save_timer.start()
+
+    def flush_config(self):
+        """Write config saved with save_config() to the config file if a write is pending"""
+        with self._config_lock:
+            if self._config_save_timer:
+                self._config_save_timer.cancel()
+                self._config_save_timer = None
+            config, self._config_pending = self._config_pending, None
+            if config is None:
+                return
+
+            # skip the write if the config file still holds this config
+            with contextlib.suppress(FileNotFoundError):
+                if self._config_cache == (self._config_stat_key(), config):
+                    self.log("config unchanged, not saving")
+                    return
+
+            # write to a temporary file then replace the config so a partial write
+            # never leaves a truncated config file
+            config_path = self._config_path
+            temp_path = f"{config_path}.tmp"
+            with open(temp_path, "wb") as f:
+                plistlib.dump(config, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, config_path)
+            self._config_cache = (self._config_stat_key(), config)
+        self.log("saved config: %s", config)
+
+    def _config_stat_key(self) -> tuple[int, int, int]:
+        """Return (inode, size, mtime) of the config file, used to detect changes
+
+        Raises: FileNotFoundError if the config file does not exist
+        """
+        st = os.stat(self._config_path)
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
 
     def on_start_on_login(self, sender):
         """Configure app to start on login or toggle this setting."""
         self.menu_start_on_login.state = not self.menu_start_on_login.state
         if self.menu_start_on_login.state:
             app_path = get_app_path()
-            self.log(f"adding app to login items with path {app_path}")
+            self.log("adding app to login items with path %s", app_path)
             if APP_NAME not in list_login_items():
                 add_login_item(APP_NAME, app_path, hidden=False)
         else:
@@ -676,15 +1294,33 @@ class Locationator(rumps.App):
         )
 
     def on_quit(self, sender):
-        """Cleanup before quitting."""
+        """Quit the app; shutdown() is called before the app terminates."""
         self.log("quitting")
-        if self.location_manager:
-            self.location_manager.dealloc()
         rumps.quit_application()
 
+    def shutdown(self):
+        """Cleanup before quitting; called by rumps before the app terminates.
+
+        Pending config changes and queued log records are written synchronously
+        so nothing is lost when the app exits.
+        """
+        if self._shut_down:
+            return
+        self._shut_down = True
+        self.log("shutting down")
+        if self.location_manager:
+            # the manager is shared so don't release it, just stop sending it events
+            self.location_manager.setDelegate_(None)
+        self._geocoder_executor.shutdown(wait=False, cancel_futures=True)
+        self._geocode_cache.close()
+        self.flush_config()
+        # flush any queued log records and close the log file
+        self._log_listener.stop()
+        self._log_file_handler.close()
+
     def notification(self, title, subtitle, message):
         """Display a notification."""
-        self.log(f"notification: {title} - {subtitle} - {message}")
+        self.log("notification: %s - %s - %s", title, subtitle, message)
         rumps.notification(title, subtitle, message)
 
     def open(self, *args, encoding=None):
@@ -701,55 +1337,80 @@ class Locationator(rumps.App):
 
     def startUpdatingLocation(self):
         """Start location update"""
-        self.log(f"startUpdatingLocation: {self.location_manager}")
+        self.log_debug("startUpdatingLocation: %s", self.location_manager)
         self.location_manager.startUpdatingLocation()
 
     def stopUpdatingLocation(self):
         """Stop location update"""
-        self.log(f"stopUpdatingLocation: {self.location_manager}")
+        self.log_debug("stopUpdatingLocation: %s", self.location_manager)
         self.location_manager.stopUpdatingLocation()
 
-    def requestLocation(self):
+    def requestLocation(self) -> bool:
         """Request current location
 
+        Returns: True if a new request was started, False if a request is already in progress
+
         Note: This returns immediately; locationManager_didUpdateLocations_ will be called when the location is updated
         To synchronously request a location, call update_current_location()
         """
-        self.log(f"requestLocation: {self.location_manager}")
-        if self._location_request_in_progress:
-            # updated in locationManager_didUpdateLocations_
-            self.log("requestLocation: request in process")
-            return
+        self.log_debug("requestLocation: %s", self.location_manager)
+        if not self._location_request_semaphore.acquire(blocking=False):
+            # released in locationManager_didUpdateLocations_
+            self.log_debug("requestLocation: request in process")
+            return False
         # start a new location request
-        self._location_request_in_progress = True
+        self._location_ready.clear()
         self._location = LocationResult()
         self.startUpdatingLocation()
         self.location_manager.requestLocation()
+        return True
 
     def locationManager_didUpdateLocations_(
         self, manager: CLLocationManager, locations: NSArray
     ):
         """Called when location is updated"""
-        self.log(f"didUpdateLocations: {locations=}")
+        self.log_debug("didUpdateLocations: locations=%r", locations)
         if locations.count() < 1:
             self.log("no locations returned")
-            self._location = LocationResult(None, None, "No locations returned")
+            self._location.error = "No locations returned"
         else:
             location = (
                 locations.lastObject()
             )  # if more than one, most current is the last item
-            self._location = LocationResult(
-                Location_from_CLLocation(location), datetime.datetime.now(), None
-            )
-        self._location_request_in_progress = False
+            self._location.location = Location_from_CLLocation(location)
+            self._location.datetime = datetime.datetime.now()
         self.stopUpdatingLocation()
+        self._location_request_done()
 
     def locationManager_didFailWithError_(self, manager: CLLocationManager, error: Any):
         """Handle errors from CLLocationManager"""
-        self.log(f"locationManager_didFailWithError_: {manager} {error}")
-        self._location = LocationResult(None, None, error)
-        self._location_request_in_progress = False
+        self.log_error("locationManager_didFailWithError_: %s %s", manager, error)
+        self._location.error = error
         self.stopUpdatingLocation()
+        self._location_request_done()
+
+    def _location_request_done(self):
+        """Mark the location request complete and wake any threads waiting for it"""
+        self._location_ready.set()
+        # the delegate may be called more than once for a request
+        with contextlib.suppress(ValueError):
+            self._location_request_semaphore.release()
+        self._wake_location_waiter()
+
+    def _cancel_location_request(self, result: LocationResult):
+        """Give up on a location request that timed out so later callers can start a new one"""
+        if self._location is not result or self._location_ready.is_set():
+            # the request already finished or was replaced
+            return
+        result.error = "Timeout waiting for location request"
+        self.stopUpdatingLocation()
+        self._location_request_done()
+
+    def _wake_location_waiter(self):
+        """Stop the run loop of the main thread if waiting in update_current_location()"""
+        if self._location_run_loop is not None:
+            CFRunLoopStop(self._location_run_loop)
+            self._location_run_loop = None
 
 
 def serviceSelector(fn):
@@ -759,7 +1420,7 @@ def serviceSelector(fn):
 
 def ErrorValue(e):
     """Handler for errors returned by the service."""
-    NSLog(f"{APP_NAME} {__version__} error: {e}")
+    NSLog("%@error: %@", LOG_PREFIX, str(e))
     return e
 
 
@@ -776,6 +1437,150 @@ class ServiceProvider(NSObject):
         self.app = app
         return self
 
+    @objc.python_method
+    def _file_paths(self, pasteboard) -> list[str]:
+        """Return the paths of the files passed on the pasteboard by the Services menu"""
+        # pasteboard will contain one or more URLs to image files passed by the Services menu;
+        # read them directly as NSURL objects rather than decoding each item's data
+        urls = pasteboard.readObjectsForClasses_options_(
+            [NSURL], {NSPasteboardURLReadingFileURLsOnlyKey: True}
+        )
+        # the same file may be passed more than once; process each file once so it isn't
+        # geocoded twice or written by two threads at the same time
+        return list(dict.fromkeys(url.path() for url in urls or []))
+
+    @objc.python_method
+    def _reverse_geocode_files(
+        self, paths: list[str], errors: list[tuple[str, Exception]]
+    ) -> tuple[list[str], list[dict[str, Any] | ReverseGeocodeError]]:
+        """Reverse geocode the location of each image file.
+
+        The locations of all files are read before any are reverse geocoded so the
+        geocode requests are queued together instead of waiting on each file in turn.
+
+        Args:
+            paths: paths of image files to process
+            errors: list to which (path, exception) is appended for each file
+                whose location cannot be read
+
+        Returns: tuple of (paths, results) for the files whose location was read where
+            each result is the reverse geocode result dict or a ReverseGeocodeError
+        """
+        located = []
+        locations = []
+        for path, location in zip(paths, self._load_image_locations(paths)):
+            self.app.log("processing file from Services menu: %s", path)
+            if isinstance(location, ValueError):
+                self.app.log_error("error processing file: %s", location)
+                errors.append((path, location))
+                continue
+            located.append(path)
+            locations.append(location)
+        return located, self.app.reverse_geocode_many(locations)
+
+    @objc.python_method
+    def _load_image_locations(
+        self, paths: list[str]
+    ) -> list[tuple[float, float] | ValueError]:
+        """Read the location of each image file, reading multiple files in parallel
+
+        Returns: list of (latitude, longitude) or the ValueError raised by
+            load_image_location() for each path, in the same order as paths
+        """
+
+        def _load(path: str) -> tuple[float, float] | ValueError:
+            try:
+                return load_image_location(path)
+            except ValueError as e:
+                return e
+
+        if len(paths) < 2:
+            return [_load(path) for path in paths]
+        # ImageIO releases the GIL while reading image metadata
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=IMAGE_WORKERS
+        ) as executor:
+            return list(executor.map(_load, paths))
+
+    @objc.python_method
+    def _write_xmp_files(
+        self,
+        files: list[tuple[str, dict[str, Any]]],
+        written: list[str],
+        errors: list[tuple[str, Exception]],
+    ):
+        """Write reverse geocode results to the XMP metadata of each file, writing multiple files in parallel
+
+        Args:
+            files: list of (path, reverse geocode result) to write
+            written: list to which the path of each file written is appended
+            errors: list to which (path, exception) is appended for each file that could not be written
+        """
+        if not files:
+            return
+        # redirect stdout/stderr once for the batch instead of once per file
+        with shared_pipes, concurrent.futures.ThreadPoolExecutor(
+            max_workers=min(IMAGE_WORKERS, len(files))
+        ) as executor:
+            futures = [
+                (path, executor.submit(write_xmp_metadata, path, result))
+                for path, result in files
+            ]
+            for path, future in futures:
+                try:
+                    xmp = future.result()
+                except (MetadataError, OSError) as e:
+                    self.app.log_error("error writing XMP metadata: %s", e)
+                    errors.append((path, e))
+                    continue
+                written.append(path)
+                self.app.log("XMP metadata written: %s", xmp)
+
+    @objc.python_method
+    def _error(self, error: Exception, label: str) -> Exception:
+        """Log and display an error then return the error value for the Services menu.
+
+        Args:
+            error: the exception that occurred
+            label: short description of what failed, used in the log message
+
+        Returns: the value to return from the service method
+        """
+        self.app.log_error("%s: %s", label, error)
+        rumps.alert("Locationator Error", str(error), ok="OK")
+        return ErrorValue(error)
+
+    @objc.python_method
+    def _report_errors(self, errors: list[tuple[str, Exception]]) -> str | None:
+        """Display a single alert summarizing the errors for a batch of files.
+
+        Args:
+            errors: list of (path, exception) for each file that failed
+
+        Returns: the value to return from the service method, None if there were no errors
+        """
+        if not errors:
+            return None
+        message = self._errors_message(errors)
+        rumps.alert("Locationator Error", message, ok="OK")
+        return ErrorValue(message)
+
+    @objc.python_method
+    def _errors_message(self, errors: list[tuple[str, Exception]]) -> str:
+        """Return message summarizing the errors for a batch of files.
+
+        Args:
+            errors: list of (path, exception) for each file that failed
+        """
+        if len(errors) == 1:
+            return str(errors[0][1])
+        message = f"{len(errors)} files failed:\n" + "\n".join(
+            f"{path}: {error}" for path, error in errors[:MAX_ERRORS_IN_ALERT]
+        )
+        if len(errors) > MAX_ERRORS_IN_ALERT:
+            message += f"\n...and {len(errors) - MAX_ERRORS_IN_ALERT} more"
+        return message
+
     @serviceSelector
     def getReverseGeocoding_userData_error_(
         self, pasteboard, userdata, error
@@ -799,44 +1604,41 @@ class ServiceProvider(NSObject):
         """
         self.app.log("getReverseGeocoding_userData_error_ called via Services menu")
 
+        # errors are collected so one bad file doesn't stop the rest of the batch
+        errors = []
+        # results for all files are shown in a single alert instead of one per file
+        result_strs = []
         with objc.autorelease_pool():
             try:
-                for item in pasteboard.pasteboardItems():
-                    # pasteboard will contain one or more URLs to image files passed by the Services menu
-                    pb_url_data = item.dataForType_(NSPasteboardTypeFileURL)
-                    pb_url = NSURL.URLWithString_(
-                        NSString.alloc().initWithData_encoding_(
-                            pb_url_data, NSUTF8StringEncoding
-                        )
-                    )
-                    self.app.log(f"processing file from Services menu: {pb_url.path()}")
-                    try:
-                        latitude, longitude = load_image_location(pb_url.path())
-                    except ValueError as e:
-                        self.app.log(f"error processing file: {e}")
-                        rumps.alert("Locationator Error", str(e), ok="OK")
-                        return ErrorValue(e)
-
-                    try:
-                        result = self.app.reverse_geocode(latitude, longitude)
-                        self.app.log(f"reverse geocode result: {result}")
-                    except ReverseGeocodeError as e:
-                        self.app.log(f"reverse geocode error: {e}")
-                        rumps.alert("Locationator Error", str(e), ok="OK")
-                        return ErrorValue(e)
-
-                    # place result on pasteboard
-                    result_str = format_result_dict(result)
-                    pasteboard = Pasteboard()
-                    pasteboard.set_text(result_str)
-                    rumps.alert(
-                        title="Reverse Geocode Result", message=result_str, ok="OK"
-                    )
+                paths, results = self._reverse_geocode_files(
+                    self._file_paths(pasteboard), errors
+                )
+                for path, result in zip(paths, results):
+                    if isinstance(result, ReverseGeocodeError):
+                        self.app.log_error("reverse geocode error: %s", result)
+                        errors.append((path, result))
+                        continue
+                    self.app.log("reverse geocode result: %s", result)
+                    result_strs.append(format_result_dict(result))
             except Exception as e:
-                rumps.alert("Locationator Error", str(e), ok="OK")
-                return ErrorValue(e)
-
-        return None
+                return self._error(e, "error")
+
+        if not result_strs:
+            return self._report_errors(errors)
+
+        # place results on pasteboard
+        result_str = "\n\n".join(result_strs)
+        self.app.pasteboard.set_text(result_str)
+        if not errors:
+            rumps.alert(title="Reverse Geocode Result", message=result_str, ok="OK")
+            return None
+        errors_message = self._errors_message(errors)
+        rumps.alert(
+            title="Reverse Geocode Result",
+            message=f"{result_str}\n\nErrors:\n{errors_message}",
+            ok="OK",
+        )
+        return ErrorValue(errors_message)
 
     @serviceSelector
     def writeReverseGeocodingToXMP_userData_error_(
@@ -861,39 +1663,31 @@ class ServiceProvider(NSObject):
         """
         self.app.log("getReverseGeocoding_userData_error_ called via Services menu")
 
+        # errors are collected so one bad file doesn't stop the rest of the batch
+        errors = []
+        # files that have been written; their directories are synced once at the end
+        written = []
         with objc.autorelease_pool():
             try:
-                for item in pasteboard.pasteboardItems():
-                    # pasteboard will contain one or more URLs to image files passed by the Services menu
-                    pb_url_data = item.dataForType_(NSPasteboardTypeFileURL)
-                    pb_url = NSURL.URLWithString_(
-                        NSString.alloc().initWithData_encoding_(
-                            pb_url_data, NSUTF8StringEncoding
-                        )
-                    )
-                    self.app.log(f"processing file from Services menu: {pb_url.path()}")
-                    try:
-                        latitude, longitude = load_image_location(pb_url.path())
-                    except ValueError as e:
-                        self.app.log(f"error processing file: {e}")
-                        rumps.alert("Locationator Error", str(e), ok="OK")
-                        return ErrorValue(e)
-
-                    try:
-                        result = self.app.reverse_geocode(latitude, longitude)
-                        self.app.log(f"reverse geocode result: {result}")
-                        xmp = write_xmp_metadata(pb_url.path(), result)
-                        self.app.log(f"XMP metadata written: {json.dumps(xmp)}")
-                    except ReverseGeocodeError as e:
-                        self.app.log(f"reverse geocode error: {e}")
-                        rumps.alert("Locationator Error", str(e), ok="OK")
-                        return ErrorValue(e)
-
+                paths, results = self._reverse_geocode_files(
+                    self._file_paths(pasteboard), errors
+                )
+                to_write = []
+                for path, result in zip(paths, results):
+                    if isinstance(result, ReverseGeocodeError):
+                        self.app.log_error("reverse geocode error: %s", result)
+                        errors.append((path, result))
+                        continue
+                    self.app.log("reverse geocode result: %s", result)
+                    to_write.append((path, result))
+                self._write_xmp_files(to_write, written, errors)
             except Exception as e:
-                rumps.alert("Locationator Error", str(e), ok="OK")
-                return ErrorValue(e)
+                return self._error(e, "error")
+            finally:
+                with contextlib.suppress(OSError):
+                    fsync_parent_directories(written)
 
-        return None
+        return self._report_errors(errors)
 
 
 if __name__ == "__main__":
@@ -2,17 +2,158 @@
 
 from __future__ import annotations
 
+import concurrent.futures
 import contextlib
+import datetime
 import http.server
+import io
+import json
+import os
 import queue
-from typing import TYPE_CHECKING
+import threading
+from typing import TYPE_CHECKING, Any
+from urllib.parse import parse_qsl
 
+import objc
 from clutils import accuracy_from_str
-from utils import validate_latitude, validate_longitude
+from utils import (
+    str_to_float,
+    validate_latitude,
+    validate_latlng_batch,
+    validate_longitude,
+)
+
+try:
+    # orjson is optional; it is faster than json and encodes datetime values natively
+    import orjson
+except ImportError:
+    orjson = None
 
 if TYPE_CHECKING:
     from locationator import Locationator
 
+# only accept connections from this machine
+SERVER_HOST = "127.0.0.1"
+
+# number of threads handling requests
+SERVER_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# maximum number of connections waiting for a worker thread;
+# further connections are rejected with 503 Service Unavailable
+SERVER_MAX_QUEUED = 128
+
+# seconds an idle keep-alive connection is held open before it is closed,
+# freeing its worker thread for other connections
+KEEP_ALIVE_TIMEOUT = 5
+
+# maximum number of locations accepted by POST /reverse_geocode
+MAX_BATCH_SIZE = 1000
+
+# maximum size in bytes of a POST request body; allows MAX_BATCH_SIZE locations
+# with room to spare but stops a client from making the server allocate arbitrary memory
+MAX_REQUEST_BODY_SIZE = 256 * 1024
+
+# error messages returned when a request times out
+REVERSE_GEOCODE_TIMEOUT_ERROR = "Timeout waiting for reverse geocode to complete"
+CURRENT_LOCATION_TIMEOUT_ERROR = "Timeout waiting for location lookup to complete"
+
+
+def json_default(obj: Any) -> Any:
+    """Default function for json.dumps to encode datetime values as ISO 8601 strings"""
+    if isinstance(obj, datetime.datetime):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {obj.__class__.__name__} is not JSON serializable")
+
+
+def json_dumps(obj: Any) -> bytes:
+    """Encode obj as UTF-8 JSON bytes ready to send, using orjson if it is installed"""
+    if orjson is not None:
+        with contextlib.suppress(TypeError):
+            # orjson.JSONEncodeError is a TypeError; fall back to json for anything it can't encode
+            return orjson.dumps(obj)
+    # match orjson's compact output
+    return json.dumps(
+        obj, default=json_default, separators=(",", ":"), ensure_ascii=False
+    ).encode("utf-8")
+
+
+def json_loads(data: bytes) -> Any:
+    """Decode JSON data, using orjson if it is installed
+
+    Raises: ValueError if data is not valid JSON
+    """
+    if orjson is not None:
+        # orjson.JSONDecodeError is a ValueError
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _service_unavailable_response() -> bytes:
+    """Return raw HTTP response sent when the server is too busy to queue a connection"""
+    body = b"Server is too busy\n"
+    return (
+        b"HTTP/1.0 503 Service Unavailable\r\n"
+        b"Content-Type: text/plain\r\n"
+        + f"Content-Length: {len(body)}\r\n\r\n".encode()
+        + body
+    )
+
+
+class ThreadPoolHTTPServer(http.server.HTTPServer):
+    """HTTP server that handles connections on a fixed pool of worker threads.
+
+    Unlike ThreadingHTTPServer, which starts a new thread for every connection,
+    connections are queued for the worker threads. If the queue is full the
+    connection is rejected with 503 Service Unavailable.
+    """
+
+    def __init__(
+        self,
+        server_address: tuple[str, int],
+        handler_class: type[http.server.BaseHTTPRequestHandler],
+        workers: int = SERVER_WORKERS,
+        max_queued: int = SERVER_MAX_QUEUED,
+    ):
+        super().__init__(server_address, handler_class)
+        self._requests = queue.Queue(maxsize=max_queued)
+        self._workers = [
+            threading.Thread(
+                target=self._worker, name=f"server-worker-{i}", daemon=True
+            )
+            for i in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def process_request(self, request, client_address):
+        """Queue the connection for a worker thread"""
+        try:
+            self._requests.put_nowait((request, client_address))
+        except queue.Full:
+            with contextlib.suppress(OSError):
+                request.sendall(_service_unavailable_response())
+            self.shutdown_request(request)
+
+    def server_close(self):
+        """Stop the worker threads and close the server"""
+        for _ in self._workers:
+            self._requests.put(None)
+        super().server_close()
+
+    def _worker(self):
+        """Handle queued connections until None is received"""
+        while (item := self._requests.get()) is not None:
+            request, client_address = item
+            # worker threads live as long as the server so drain Objective-C objects
+            # autoreleased while handling each connection instead of accumulating them
+            with objc.autorelease_pool():
+                try:
+                    self.finish_request(request, client_address)
+                except Exception:
+                    self.handle_error(request, client_address)
+                finally:
+                    self.shutdown_request(request)
+
 
 def run_server(app: Locationator, port: int, timeout: int):
     """Run the HTTP server
@@ -23,6 +164,11 @@ def run_server(app: Locationator, port: int, timeout: int):
         timeout: Timeout in seconds for reverse geocode requests
     """
 
+    # response to GET / doesn't change while the server is running
+    root_response = (
+        f"Locationator server version {app.version} is running on port {port}\n"
+    ).encode("utf-8")
+
     # Handler class defined here so it can access the app instance and the port
 
     class Handler(http.server.SimpleHTTPRequestHandler):
@@ -35,51 +181,154 @@ def run_server(app: Locationator, port: int, timeout: int):
         # Would be nice to use FastAPI, etc. but I couldn't make that work when
         # called from the Rumps app.
 
+        # HTTP/1.1 keeps the connection open between requests so clients making
+        # sequential requests don't pay for a new connection each time;
+        # every response must therefore send Content-Length (see _send_response)
+        protocol_version = "HTTP/1.1"
+
+        # buffer the response so the headers and body are sent with a single write;
+        # the buffer is flushed after each request is handled
+        wbufsize = io.DEFAULT_BUFFER_SIZE
+
+        # send each response as soon as it's written instead of waiting on
+        # Nagle's algorithm to coalesce it with data that will never come
+        disable_nagle_algorithm = True
+
+        # a connection is handled by one worker thread until it is closed
+        # so don't let idle connections hold on to a worker indefinitely
+        timeout = KEEP_ALIVE_TIMEOUT
+
         def do_GET(self):
-            app.log(f"do_GET: {self.path=}")
-            if self.path == "/":
-                self.send_success(
-                    f"Locationator server version {app.version} is running on port {port}\n",
-                    content_type="text/plain",
-                )
-            elif self.path.split("?")[0] == "/reverse_geocode":
-                query_dict = self.get_query_args()
-                if "latitude" not in query_dict or "longitude" not in query_dict:
-                    self.send_bad_request("Missing latitude or longitude query arg")
-                    return
-                if not validate_latitude(query_dict["latitude"]):
-                    self.send_bad_request("Invalid latitude")
-                    return
-                if not validate_longitude(query_dict["longitude"]):
-                    self.send_bad_request("Invalid longitude")
-                    return
-                success, result = self.reverse_geocode(
-                    float(query_dict["latitude"]), float(query_dict["longitude"])
-                )
-                app.log(f"do_GET: {success=}, {result=}")
-                if success:
-                    self.send_success(result)
-                else:
-                    self.send_server_error(result)
-            elif self.path.split("?")[0] == "/current_location":
-                query_dict = self.get_query_args()
-                if accuracy_str := query_dict.get("accuracy"):
-                    try:
-                        accuracy = accuracy_from_str(accuracy_str)
-                    except ValueError as e:
-                        self.send_bad_request("Invalid accuracy")
-                        return
-                else:
-                    accuracy = None
-                success, result = self.current_location(accuracy=accuracy)
-                app.log(f"do_GET: {success=}, {result=}")
-                if success:
-                    self.send_success(result)
-                else:
-                    self.send_server_error(result)
+            app.log_debug("do_GET: self.path=%r", self.path)
+            path, _, query = self.path.partition("?")
+            if self.has_body():
+                # GET handlers never read a body so the connection can't be reused
+                self.close_connection = True
+            if handler := self.GET_ROUTES.get(path):
+                handler(self, query)
+            else:
+                self.send_not_found(self.path)
+
+        def do_POST(self):
+            app.log_debug("do_POST: self.path=%r", self.path)
+            path, _, query = self.path.partition("?")
+            if handler := self.POST_ROUTES.get(path):
+                handler(self, query)
             else:
+                # the body isn't read so the connection can't be reused
+                self.close_connection = True
                 self.send_not_found(self.path)
 
+        def handle_root(self, query: str):
+            """Handle GET /"""
+            self.send_success(root_response, content_type="text/plain")
+
+        def handle_reverse_geocode(self, query: str):
+            """Handle GET /reverse_geocode"""
+            query_dict = self.get_query_args(query)
+            if "latitude" not in query_dict or "longitude" not in query_dict:
+                self.send_bad_request("Missing latitude or longitude query arg")
+                return
+            # convert once; the validators take their fast path for floats
+            latitude = str_to_float(query_dict["latitude"])
+            if not validate_latitude(latitude):
+                self.send_bad_request("Invalid latitude")
+                return
+            longitude = str_to_float(query_dict["longitude"])
+            if not validate_longitude(longitude):
+                self.send_bad_request("Invalid longitude")
+                return
+            nocache = query_dict.get("nocache", "").lower() in ("1", "true")
+            success, result = self.reverse_geocode(
+                latitude, longitude, use_cache=not nocache
+            )
+            app.log_debug("do_GET: success=%r, result=%r", success, result)
+            if success:
+                self.send_success(result)
+            else:
+                self.send_server_error(result)
+
+        def handle_current_location(self, query: str):
+            """Handle GET /current_location"""
+            query_dict = self.get_query_args(query)
+            if accuracy_str := query_dict.get("accuracy"):
+                try:
+                    accuracy = accuracy_from_str(accuracy_str)
+                except ValueError as e:
+                    self.send_bad_request("Invalid accuracy")
+                    return
+            else:
+                accuracy = None
+            success, result = self.current_location(accuracy=accuracy)
+            app.log_debug("do_GET: success=%r, result=%r", success, result)
+            if success:
+                self.send_success(result)
+            else:
+                self.send_server_error(result)
+
+        def handle_reverse_geocode_batch(self, query: str):
+            """Handle POST /reverse_geocode"""
+            # the body isn't read if it's rejected so the connection can't be reused
+            if "Transfer-Encoding" in self.headers:
+                self.close_connection = True
+                self.send_length_required("Body must be sent with Content-Length")
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+            except ValueError:
+                length = -1
+            if length < 0:
+                self.close_connection = True
+                self.send_bad_request("Invalid Content-Length")
+                return
+            if length > MAX_REQUEST_BODY_SIZE:
+                self.close_connection = True
+                self.send_payload_too_large(
+                    f"Body must be at most {MAX_REQUEST_BODY_SIZE} bytes"
+                )
+                return
+            # a missing Content-Type is accepted; get_content_type() ignores parameters
+            # such as charset and returns text/plain if the header can't be parsed
+            if (
+                "Content-Type" in self.headers
+                and self.headers.get_content_type() != "application/json"
+            ):
+                self.close_connection = True
+                self.send_unsupported_media_type(
+                    "Content-Type must be application/json"
+                )
+                return
+            try:
+                points = json_loads(self.rfile.read(length))
+            except ValueError:
+                self.send_bad_request("Body must be a JSON array")
+                return
+            if not isinstance(points, list):
+                self.send_bad_request("Body must be a JSON array")
+                return
+            if len(points) > MAX_BATCH_SIZE:
+                self.send_bad_request(
+                    f"Too many locations, maximum is {MAX_BATCH_SIZE}"
+                )
+                return
+            try:
+                points = validate_latlng_batch(points)
+            except ValueError as e:
+                self.send_bad_request(str(e))
+                return
+            results = self.reverse_geocode_batch(points)
+            self.send_success(json_dumps(results))
+
+        # map request path (without the query string) to the method that handles it
+        GET_ROUTES = {
+            "/": handle_root,
+            "/reverse_geocode": handle_reverse_geocode,
+            "/current_location": handle_current_location,
+        }
+        POST_ROUTES = {
+            "/reverse_geocode": handle_reverse_geocode_batch,
+        }
+
         def send_bad_request(self, error_str: str):
             """Send bad request response"""
             self._send_response(400, "text/plain", "Bad request: " + error_str)
@@ -88,8 +337,24 @@ def run_server(app: Locationator, port: int, timeout: int):
             """Send not found response"""
             self._send_response(404, "text/plain", "Not found: " + error_str)
 
+        def send_length_required(self, error_str: str):
+            """Send length required response"""
+            self._send_response(411, "text/plain", "Length required: " + error_str)
+
+        def send_payload_too_large(self, error_str: str):
+            """Send payload too large response"""
+            self._send_response(413, "text/plain", "Payload too large: " + error_str)
+
+        def send_unsupported_media_type(self, error_str: str):
+            """Send unsupported media type response"""
+            self._send_response(
+                415, "text/plain", "Unsupported media type: " + error_str
+            )
+
         def send_success(
-            self, result: str, content_type: str = "application/json;charset=UTF-8"
+            self,
+            result: bytes | str,
+            content_type: str = "application/json;charset=UTF-8",
         ):
             """Send success response"""
             self._send_response(200, content_type, result)
@@ -98,73 +363,110 @@ def run_server(app: Locationator, port: int, timeout: int):
             """Send server error response"""
             self._send_response(500, "text/plain", result)
 
-        def _send_response(self, code: int, content_type: str, body: str):
-            """Send response with given code, content type and body"""
+        def _send_response(self, code: int, content_type: str, body: bytes | str):
+            """Send response with given code, content type and body
+
+            str bodies are encoded as UTF-8.
+            """
+            if isinstance(body, str):
+                body = body.encode("utf-8")
             self.send_response(code)
             self.send_header("Content-type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            if self.close_connection:
+                self.send_header("Connection", "close")
             self.end_headers()
-            self.wfile.write(body.encode())
+            self.wfile.write(body)
 
-        def get_query_args(self) -> dict[str, str]:
+        def has_body(self) -> bool:
+            """Return True if the request has a body"""
+            return "Transfer-Encoding" in self.headers or self.headers.get(
+                "Content-Length", "0"
+            ).strip() not in ("", "0")
+
+        def get_query_args(self, query: str) -> dict[str, str]:
             """Parse query string and return dict of query args."""
-            try:
-                query = self.path.split("?")[1]
-                return dict(qc.split("=") for qc in query.split("&"))
-            except (IndexError, ValueError):
-                return {}
-
-        # def handle_reverse_geocode_put(self, body: dict) -> tuple[bool, str]:
-        #     """Perform reverse geocode of latitude/longitude in body."""
-        #     success = False
-        #     try:
-        #         latitude = float(body["latitude"])
-        #         longitude = float(body["longitude"])
-        #         success = True
-        #     except ValueError as e:
-        #         result = f"Invalid latitude/longitude: {e}"
-
-        #     if not success:
-        #         return success, result
-
-        #     return self.reverse_geocode(latitude, longitude)
+            return dict(parse_qsl(query, keep_blank_values=True))
+
+        def reverse_geocode_batch(
+            self, points: list[tuple[float, float]]
+        ) -> list[dict[str, Any]]:
+            """Perform reverse geocode of a list of (latitude, longitude) tuples.
+
+            Returns: list of {"success": bool, "result": dict or error message}
+                in the same order as points
+            """
+            app.log_debug("reverse_geocode_batch: %s locations", len(points))
+            return [
+                (
+                    {"success": True, "result": result}
+                    if isinstance(result, dict)
+                    else {"success": False, "result": str(result)}
+                )
+                for result in app.reverse_geocode_many(points, timeout=timeout)
+            ]
 
         def reverse_geocode(
-            self, latitude: float, longitude: float
-        ) -> tuple[bool, str]:
-            """Perform reverse geocode of latitude/longitude."""
-            geocode_queue = queue.Queue()
-            app.log(
-                f"reverse_geocode: {geocode_queue=}, {latitude=}, {longitude=}, {timeout=}, calling reverse_geocode"
+            self, latitude: float, longitude: float, use_cache: bool = True
+        ) -> tuple[bool, bytes | str]:
+            """Perform reverse geocode of latitude/longitude.
+
+            Returns: tuple of (success, result) where result is the JSON encoded
+                result if success is True otherwise an error message
+            """
+            app.log_debug(
+                "reverse_geocode: latitude=%r, longitude=%r, timeout=%r, calling reverse_geocode",
+                latitude,
+                longitude,
+                timeout,
+            )
+            if use_cache and (
+                cached := app.cached_reverse_geocode_json(latitude, longitude)
+            ):
+                # already encoded so there's nothing to copy or serialize
+                app.log_debug("reverse_geocode: cache hit")
+                return True, cached
+            future = app.reverse_geocode_future(
+                latitude, longitude, use_cache=use_cache
             )
-            app.reverse_geocode_with_queue(latitude, longitude, geocode_queue)
             try:
-                success, result = geocode_queue.get(block=True, timeout=timeout)
-                geocode_queue.task_done()
-            except queue.Empty:
+                success, result = future.result(timeout=timeout)
+            except concurrent.futures.TimeoutError:
+                app.cancel_reverse_geocode(future)
                 success = False
-                result = "Timeout waiting for reverse geocode to complete"
-            app.log(f"reverse_geocode: {success=}, {result=}")
+                result = REVERSE_GEOCODE_TIMEOUT_ERROR
+            if success:
+                result = json_dumps(result)
+            app.log_debug("reverse_geocode: success=%r, result=%r", success, result)
             return success, result
 
-        def current_location(self, accuracy: float | None) -> tuple[bool, str]:
-            """Perform lookup of current location."""
-            location_queue = queue.Queue()
-            app.log(
-                f"current_location: {location_queue=}, {timeout=}, {accuracy=}, calling current_location"
+        def current_location(
+            self, accuracy: float | None
+        ) -> tuple[bool, bytes | str]:
+            """Perform lookup of current location.
+
+            Returns: tuple of (success, result) where result is the JSON encoded
+                location if success is True otherwise an error message
+            """
+            app.log_debug(
+                "current_location: timeout=%r, accuracy=%r, calling current_location",
+                timeout,
+                accuracy,
             )
-            app.current_location_with_queue(location_queue, accuracy=accuracy)
+            future = app.current_location_future(accuracy=accuracy)
             try:
-                success, result = location_queue.get(block=True, timeout=timeout)
-                location_queue.task_done()
-            except queue.Empty:
+                success, result = future.result(timeout=timeout)
+            except concurrent.futures.TimeoutError:
                 success = False
-                result = "Timeout waiting for location lookup to complete"
-            app.log(f"current_location: {success=}, {result=}")
+                result = CURRENT_LOCATION_TIMEOUT_ERROR
+            if success:
+                result = json_dumps(result)
+            app.log_debug("current_location: success=%r, result=%r", success, result)
             return success, result
 
-    http.server.ThreadingHTTPServer.allow_reuse_address = True
-    with http.server.ThreadingHTTPServer(("", port), Handler) as httpd:
-        app.log(f"serving at port {port}, with timeout {timeout}")
+    ThreadPoolHTTPServer.allow_reuse_address = True
+    with ThreadPoolHTTPServer((SERVER_HOST, port), Handler) as httpd:
+        app.log("serving at port %s, with timeout %s", port, timeout)
         with contextlib.suppress(KeyboardInterrupt):
             httpd.serve_forever()
         httpd.server_close()
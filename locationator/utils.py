@@ -2,11 +2,26 @@
 
 from __future__ import annotations
 
+import functools
 import platform
+import re
 from typing import Any, Tuple
 
 import objc
-from Foundation import NSBundle, NSDesktopDirectory, NSFileManager, NSUserDomainMask
+from Foundation import (
+    NSBundle,
+    NSDesktopDirectory,
+    NSDirectoryEnumerationSkipsSubdirectoryDescendants,
+    NSFileManager,
+    NSUserDomainMask,
+)
+
+# latitude and longitude separated by a comma and/or whitespace, e.g. "37.33, -122.03"
+LAT_LONG_RE = re.compile(
+    r"^\s*([-+]?(?:\d+(?:\.\d*)?|\.\d+))"
+    r"\s*[,\s]\s*"
+    r"([-+]?(?:\d+(?:\.\d*)?|\.\d+))\s*$"
+)
 
 
 def str_or_none(value: Any) -> str:
@@ -14,6 +29,14 @@ def str_or_none(value: Any) -> str:
     return str(value) if value is not None else ""
 
 
+def str_to_float(value: Any) -> float | None:
+    """Convert value to float or return None if it can't be converted"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
 def verify_desktop_access():
     """Verify that the app has access to the user's Desktop
 
@@ -23,25 +46,41 @@ def verify_desktop_access():
     Returns: True if access is granted, False otherwise.
     """
     with objc.autorelease_pool():
+        file_manager = NSFileManager.defaultManager()
         (
             desktop_url,
             error,
-        ) = NSFileManager.defaultManager().URLForDirectory_inDomain_appropriateForURL_create_error_(
+        ) = file_manager.URLForDirectory_inDomain_appropriateForURL_create_error_(
             NSDesktopDirectory, NSUserDomainMask, None, False, None
         )
         if error:
             return False
-        (
-            desktop_files,
-            error,
-        ) = NSFileManager.defaultManager().contentsOfDirectoryAtURL_includingPropertiesForKeys_options_error_(
-            desktop_url, [], 0, None
+        # reading the first entry is enough to trigger the access check
+        # so don't list the whole Desktop
+        errors = []
+
+        def _error_handler(url, error):
+            errors.append(error)
+            return False
+
+        enumerator = file_manager.enumeratorAtURL_includingPropertiesForKeys_options_errorHandler_(
+            desktop_url,
+            [],
+            NSDirectoryEnumerationSkipsSubdirectoryDescendants,
+            _error_handler,
         )
-        return not error
+        if enumerator is None:
+            return False
+        enumerator.nextObject()
+        return not errors
 
 
+@functools.cache
 def get_mac_os_version() -> Tuple[str, str, str]:
-    """Returns tuple of str in form (version, major, minor) containing OS version, e.g. 10.13.6 = ("10", "13", "6")"""
+    """Returns tuple of str in form (version, major, minor) containing OS version, e.g. 10.13.6 = ("10", "13", "6")
+
+    The result is cached as the OS version can't change while the app is running.
+    """
     version = platform.mac_ver()[0].split(".")
     if len(version) == 2:
         (ver, major) = version
@@ -64,42 +103,90 @@ def get_mac_os_version() -> Tuple[str, str, str]:
     return (ver, major, minor)
 
 
+@functools.cache
 def get_app_path() -> str:
     """Return path to the bundle containing this script"""
     # Note: This must be called from an app bundle built with py2app or you'll get
     # the path of the python interpreter instead of the actual app
+    # The bundle path can't change while the app is running so the result is cached
     return NSBundle.mainBundle().bundlePath()
 
 
 def validate_latitude(latitude: str | float) -> bool:
     """Return True if latitude is valid, False otherwise"""
+    if type(latitude) is float:
+        # already converted; NaN fails the comparison
+        return -90 <= latitude <= 90
     try:
         latitude = float(latitude)
         return -90 <= latitude <= 90
-    except ValueError:
+    except (TypeError, ValueError):
         return False
 
 
 def validate_longitude(longitude: str | float) -> bool:
     """Return True if longitude is valid, False otherwise"""
+    if type(longitude) is float:
+        # already converted; NaN fails the comparison
+        return -180 <= longitude <= 180
     try:
         longitude = float(longitude)
         return -180 <= longitude <= 180
-    except ValueError:
+    except (TypeError, ValueError):
         return False
 
 
+def validate_latlng_batch(points: list[Any]) -> list[tuple[float, float]]:
+    """Validate a list of {"latitude": ..., "longitude": ...} dicts in a single pass
+
+    Args:
+        points: list of dicts with latitude and longitude values
+
+    Returns: list of (latitude, longitude) tuples of floats in the same order as points
+
+    Raises:
+        ValueError: if any point is missing a value or has an invalid latitude or longitude;
+            the error message includes the index of the first invalid point
+    """
+    results = []
+    for index, point in enumerate(points):
+        try:
+            latitude = point["latitude"]
+            longitude = point["longitude"]
+        except (KeyError, TypeError):
+            raise ValueError(f"Missing latitude or longitude at index {index}")
+        # decoded JSON numbers are usually floats already so skip converting them;
+        # JSON true/false decode to bools which float() would accept as 1.0/0.0
+        if type(latitude) is not float:
+            latitude = None if isinstance(latitude, bool) else str_to_float(latitude)
+        if latitude is None or not -90 <= latitude <= 90:
+            raise ValueError(f"Invalid latitude at index {index}")
+        if type(longitude) is not float:
+            longitude = None if isinstance(longitude, bool) else str_to_float(longitude)
+        if longitude is None or not -180 <= longitude <= 180:
+            raise ValueError(f"Invalid longitude at index {index}")
+        results.append((latitude, longitude))
+    return results
+
+
 def flatten_dict(d: dict) -> dict:
     """Flatten nested dict into a single level dict"""
-
-    def expand(key, value):
-        if isinstance(value, dict):
-            return [(key + "." + k, v) for k, v in flatten_dict(value).items()]
+    # walk the nested dicts with an explicit stack of iterators instead of recursing;
+    # keys are added in the same depth-first order as the nested dicts
+    flat = {}
+    stack = [("", iter(d.items()))]
+    while stack:
+        prefix, items = stack[-1]
+        for key, value in items:
+            if prefix:
+                key = prefix + key
+            if isinstance(value, dict):
+                stack.append((key + ".", iter(value.items())))
+                break
+            flat[key] = value
         else:
-            return [(key, value)]
-
-    items = [item for k, v in d.items() for item in expand(k, v)]
-    return dict(items)
+            stack.pop()
+    return flat
 
 
 def get_lat_long_from_string(s: str) -> tuple[float, float]:
@@ -113,15 +200,10 @@ def get_lat_long_from_string(s: str) -> tuple[float, float]:
     Raises:
         ValueError: if latitude or longitude is invalid or cannot be parsed
     """
-    try:
-        lat, lng = s.split(",")
-    except ValueError:
-        try:
-            lat, lng = s.split(" ")
-        except ValueError:
-            raise ValueError(f"Could not parse latitude/longitude from string: {s}")
-    lat = lat.strip()
-    lng = lng.strip()
+    if not (match := LAT_LONG_RE.match(s)):
+        raise ValueError(f"Could not parse latitude/longitude from string: {s}")
+    lat = float(match.group(1))
+    lng = float(match.group(2))
     if not validate_latitude(lat):
         raise ValueError(f"Invalid latitude: {lat}")
     if not validate_longitude(lng):
@@ -2,16 +2,48 @@
 
 from __future__ import annotations
 
-from typing import Any
+import contextlib
+import operator
+import os
+import re
+import shutil
+from typing import Any, BinaryIO
 
+import objc
 from image_metadata import (
-    load_image_location,
+    TEMP_FILE_SUFFIX,
     load_image_metadata_ref,
+    metadata_ref_create_from_xmp,
     metadata_ref_create_mutable,
-    metadata_ref_set_tag,
+    metadata_ref_create_xmp,
+    metadata_ref_set_tags,
     metadata_ref_write_to_file,
+    replace_file,
 )
 
+# XMP fields written by write_xmp_metadata and the reverse geocode result fields they're read from
+XMP_FIELDS = (
+    "Iptc4xmpCore:CountryCode",
+    "photoshop:Country",
+    "photoshop:State",
+    "photoshop:City",
+    "Iptc4xmpCore:Location",
+)
+XMP_RESULT_GETTER = operator.itemgetter(
+    "ISOcountryCode", "country", "administrativeArea", "locality", "name"
+)
+
+# JPEG markers used to locate the XMP APP1 segment
+JPEG_SOI = b"\xff\xd8"
+JPEG_APP1 = 0xE1
+JPEG_SOS = 0xDA
+
+# APP1 segments containing XMP start with this namespace header
+XMP_APP1_HEADER = b"http://ns.adobe.com/xap/1.0/\x00"
+
+# the XMP packet trailer; padding goes immediately before it
+XMP_PACKET_END_RE = re.compile(rb"<\?xpacket\s+end=")
+
 
 def write_xmp_metadata(filepath: str, results: dict[str, Any]) -> dict[str, Any]:
     """Write reverse geolocation-related fields to file metadata
@@ -28,25 +60,150 @@ def write_xmp_metadata(filepath: str, results: dict[str, Any]) -> dict[str, Any]
     - XMP:State / photoshop:State (administrativeArea)
     - XMP:City / photoshop:City (locality)
     - XMP:Location / Iptc4xmpCore:Location (name)
+
+    For JPEG files with an XMP packet, the fields are set in that packet and, if it still
+    fits in the existing XMP segment, it is replaced without re-encoding the image;
+    otherwise the image is rewritten with ImageIO.
     """
 
-    metadata = {
-        "Iptc4xmpCore:CountryCode": results["ISOcountryCode"],
-        "photoshop:Country": results["country"],
-        "photoshop:State": results["administrativeArea"],
-        "photoshop:City": results["locality"],
-        "Iptc4xmpCore:Location": results["name"],
-    }
+    metadata = dict(zip(XMP_FIELDS, XMP_RESULT_GETTER(results)))
 
-    metadata_ref = load_image_metadata_ref(filepath)
-    metadata_ref_mutable = metadata_ref_create_mutable(metadata_ref)
-    for key, value in metadata.items():
-        metadata_ref_mutable = metadata_ref_set_tag(metadata_ref_mutable, key, value)
+    # drain intermediate Core Foundation objects before returning
+    with objc.autorelease_pool():
+        if is_jpeg(filepath) and _jpeg_write_xmp_tags(filepath, metadata):
+            return metadata
 
-    metadata_ref_write_to_file(filepath, metadata_ref_mutable)
+        metadata_ref = load_image_metadata_ref(filepath)
+        metadata_ref_mutable = metadata_ref_set_tags(
+            metadata_ref_create_mutable(metadata_ref), metadata
+        )
+        metadata_ref_write_to_file(filepath, metadata_ref_mutable)
 
-    # These are Core Foundation objects that need to be released
-    del metadata_ref
-    del metadata_ref_mutable
+        # These are Core Foundation objects that need to be released
+        del metadata_ref
+        del metadata_ref_mutable
 
     return metadata
+
+
+def _jpeg_write_xmp_tags(filepath: str, tags: dict[str, Any]) -> bool:
+    """Set tags in the XMP packet of a JPEG file; returns False if the packet can't be replaced"""
+    xmp = jpeg_read_xmp(filepath)
+    if xmp is None:
+        return False
+    # start from the packet in the file rather than the metadata ImageIO reads from
+    # the image which also includes EXIF and IPTC fields mapped to XMP
+    metadata_ref = metadata_ref_create_from_xmp(xmp)
+    if metadata_ref is None:
+        return False
+    xmp = metadata_ref_create_xmp(metadata_ref_set_tags(metadata_ref, tags))
+    del metadata_ref
+    return jpeg_replace_xmp(filepath, xmp)
+
+
+def is_jpeg(filepath: str | os.PathLike) -> bool:
+    """Return True if the file at filepath is a JPEG, determined by its magic bytes"""
+    with open(filepath, "rb") as f:
+        return f.read(len(JPEG_SOI)) == JPEG_SOI
+
+
+def jpeg_read_xmp(filepath: str | os.PathLike) -> bytes | None:
+    """Return the XMP packet of a JPEG file or None if it doesn't have one"""
+    with open(filepath, "rb") as f:
+        span = _jpeg_find_xmp_packet(f)
+        if span is None:
+            return None
+        start, end = span
+        f.seek(start)
+        return f.read(end - start)
+
+
+def jpeg_replace_xmp(filepath: str | os.PathLike, xmp: bytes) -> bool:
+    """Replace the XMP packet of a JPEG file.
+
+    Args:
+        filepath: Path to the JPEG file
+        xmp: serialized XMP packet to write
+
+    Returns: True if the packet was replaced, False if the file has no XMP segment
+        or the new packet does not fit in the existing segment.
+
+    Note: The file is copied and only the bytes of the XMP packet in the copy are
+    overwritten; the size of the file and the layout of the segments is not changed.
+    Unused space is padded with whitespace as permitted by the XMP specification.
+    The copy then replaces the original with replace_file() so a failed write never
+    leaves a partially written image behind. Symlinks are resolved so the file they
+    point to is updated.
+    """
+    filepath = os.path.realpath(filepath)
+    with open(filepath, "rb") as f:
+        span = _jpeg_find_xmp_packet(f)
+    if span is None:
+        return False
+    start, end = span
+    packet = _pad_xmp_packet(xmp, end - start)
+    if packet is None:
+        return False
+
+    temp_path = f"{filepath}{TEMP_FILE_SUFFIX}"
+    try:
+        shutil.copyfile(filepath, temp_path)
+        with open(temp_path, "r+b") as f:
+            f.seek(start)
+            f.write(packet)
+        replace_file(temp_path, filepath)
+    finally:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(temp_path)
+    return True
+
+
+def _pad_xmp_packet(xmp: bytes, size: int) -> bytes | None:
+    """Pad xmp with whitespace to size bytes or return None if it is larger than size
+
+    The padding goes immediately before the xpacket trailer if there is one.
+    """
+    padding = size - len(xmp)
+    if padding < 0:
+        return None
+    if match := XMP_PACKET_END_RE.search(xmp):
+        return xmp[: match.start()] + b" " * padding + xmp[match.start() :]
+    return xmp + b" " * padding
+
+
+def _jpeg_find_xmp_packet(f: BinaryIO) -> tuple[int, int] | None:
+    """Return (start, end) offsets of the XMP packet in a JPEG file or None if not found
+
+    Only the segment headers are read; f must be opened in binary mode.
+    """
+    f.seek(0)
+    if f.read(2) != JPEG_SOI:
+        return None
+    size = os.fstat(f.fileno()).st_size
+    offset = 2
+    while offset + 4 <= size:
+        f.seek(offset)
+        header = f.read(4)
+        if header[0] != 0xFF:
+            return None
+        marker = header[1]
+        if marker == 0xFF:
+            # fill byte
+            offset += 1
+            continue
+        if marker == JPEG_SOS:
+            # metadata segments all precede the image data
+            return None
+        length = int.from_bytes(header[2:4], "big")
+        segment_start = offset + 4
+        segment_end = offset + 2 + length
+        if length < 2 or segment_end > size:
+            return None
+        if (
+            marker == JPEG_APP1
+            and segment_start + len(XMP_APP1_HEADER) <= segment_end
+            and f.read(len(XMP_APP1_HEADER)) == XMP_APP1_HEADER
+        ):
+            return segment_start + len(XMP_APP1_HEADER), segment_end
+        offset = segment_end
+    return None
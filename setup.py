@@ -28,6 +28,7 @@ DATA_FILES = [
     "locationator/copyfile.py",
     "locationator/exiftool.py",
     "locationator/exiftool_filetypes.py",
+    "locationator/geocode_cache.py",
     "locationator/icon_black.png",
     "locationator/icon_white.png",
     "locationator/image_metadata.py",
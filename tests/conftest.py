@@ -1,15 +1,20 @@
 """Test configuration for pytest for Locationator tests."""
 
+import contextlib
+import functools
 import os
 import pathlib
 import plistlib
 import shutil
+import subprocess
+import sys
 import time
 import typing as t
 from contextlib import contextmanager
 from io import TextIOWrapper
 
 import applescript
+import httpx
 import pytest
 from applescript import kMissingValue
 
@@ -17,6 +22,15 @@ from .loginitems import add_login_item, list_login_items, remove_login_item
 
 APP_NAME = "Locationator"
 
+# the app's modules import each other by name as they do in the app bundle
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent / "locationator"))
+
+
+@functools.cache
+def compiled_applescript(source: str) -> applescript.AppleScript:
+    """Return AppleScript compiled from source; each script is compiled only once per session"""
+    return applescript.AppleScript(source)
+
 
 def click_menu_item(menu_item: str, sub_menu_item: t.Optional[str] = None) -> bool:
     """Click menu_item in app's status bar menu.
@@ -34,7 +48,7 @@ def click_menu_item(menu_item: str, sub_menu_item: t.Optional[str] = None) -> bo
     menu bar 1 is the Apple menu. In RUMPS apps, it appears that the menu bar you want is
     menu bar 1. This may be different for other apps.
     """
-    scpt = applescript.AppleScript(
+    scpt = compiled_applescript(
         """
     on click_menu_item(process_, menu_item_name_, submenu_item_name_)
         try
@@ -68,7 +82,7 @@ def click_window_button(window: int, button: int) -> bool:
     Returns:
         True if successful, False otherwise
     """
-    scpt = applescript.AppleScript(
+    scpt = compiled_applescript(
         """
         on click_window_button(process_, window_number_, button_number_)
             try
@@ -89,7 +103,7 @@ def click_window_button(window: int, button: int) -> bool:
 
 def process_is_running(process_name: str) -> bool:
     """Return True if process_name is running, False otherwise"""
-    scpt = applescript.AppleScript(
+    scpt = compiled_applescript(
         """
         on process_is_running(process_name_)
             tell application "System Events"
@@ -120,36 +134,65 @@ def log_file() -> TextIOWrapper:
 def backup_log():
     """Backup log file"""
     log_path = app_support_dir() / f"{APP_NAME}.log"
-    if log_path.exists():
-        log_path.rename(log_path.with_suffix(".log.bak"))
+    with contextlib.suppress(FileNotFoundError):
+        os.replace(log_path, log_path.with_suffix(".log.bak"))
 
 
 def restore_log():
     """Restore log file from backup"""
     log_path = app_support_dir() / f"{APP_NAME}.log.bak"
-    if log_path.exists():
-        log_path.rename(log_path.parent / log_path.stem)
+    with contextlib.suppress(FileNotFoundError):
+        os.replace(log_path, log_path.parent / log_path.stem)
 
 
 def backup_plist():
     """Backup plist file"""
     plist_path = app_support_dir() / f"{APP_NAME}.plist"
-    if plist_path.exists():
-        plist_path.rename(plist_path.with_suffix(".plist.bak"))
+    with contextlib.suppress(FileNotFoundError):
+        os.replace(plist_path, plist_path.with_suffix(".plist.bak"))
 
 
 def restore_plist():
     """Restore plist file from backup"""
     plist_path = app_support_dir() / f"{APP_NAME}.plist.bak"
-    if plist_path.exists():
-        plist_path.rename(plist_path.parent / plist_path.stem)
+    with contextlib.suppress(FileNotFoundError):
+        os.replace(plist_path, plist_path.parent / plist_path.stem)
+
+
+def wait_for_server(port: int, timeout: float = 30.0) -> bool:
+    """Wait for the app's server to respond on port.
+
+    Returns: True if the server responded before timeout, False otherwise.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://localhost:{port}/", timeout=0.5).status_code == 200:
+                return True
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    return False
+
+
+def kill_app():
+    """Quit the app if it's running"""
+    subprocess.run(["killall", APP_NAME], stderr=subprocess.DEVNULL)
 
 
-@pytest.fixture(autouse=True, scope="session")
-def setup_teardown():
-    """Fixture to execute asserts before and after test session is run"""
+def launch_app():
+    """Launch the app"""
+    subprocess.run(["open", "-a", APP_NAME])
+
+
+@pytest.fixture(scope="session")
+def setup_teardown(port):
+    """Fixture to launch the app before and restore the user's settings after the tests that use it
+
+    Used by the tests of the running app; unit tests of the app's modules don't need it.
+    """
     # setup
-    os.system(f"killall {APP_NAME}")
+    kill_app()
 
     # backup_log()
     backup_plist()
@@ -160,21 +203,35 @@ def setup_teardown():
     if login_item:
         remove_login_item(f"{APP_NAME}")
 
-    os.system(f"open -a {APP_NAME}")
-    time.sleep(5)
+    launch_app()
+    # don't fail here or teardown won't restore the user's settings;
+    # if the server didn't start, the tests will fail to connect
+    wait_for_server(port)
 
     yield  # run tests
 
-    # teardown
-    os.system(f"killall {APP_NAME}")
-
-    # restore_log()
-    restore_plist()
+    # teardown; run every step even if an earlier one fails so the user's
+    # settings and login item are restored and the app is left running
+    kill_app()
 
+    errors = []
+    teardown_steps = [restore_plist]  # restore_log
     if login_item:
-        add_login_item(f"{APP_NAME}", f"/Applications/{APP_NAME}.app", False)
+        teardown_steps.append(
+            lambda: add_login_item(
+                f"{APP_NAME}", f"/Applications/{APP_NAME}.app", False
+            )
+        )
+    for step in teardown_steps:
+        try:
+            step()
+        except Exception as e:
+            errors.append(e)
 
-    os.system(f"open -a {APP_NAME}")
+    launch_app()
+
+    if errors:
+        pytest.fail("Teardown failed: " + "; ".join(str(e) for e in errors))
 
 
 @pytest.fixture
@@ -194,8 +251,16 @@ def suspend_capture(pytestconfig):
     yield suspend_guard()
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def port() -> int:
     """Return port number to use for server"""
-    data = plistlib.load(open(f"tests/data/{APP_NAME}.plist", "rb"))
+    with open(f"tests/data/{APP_NAME}.plist", "rb") as f:
+        data = plistlib.load(f)
     return data["port"]
+
+
+@pytest.fixture(scope="session")
+def client(port) -> t.Iterator[httpx.Client]:
+    """Return HTTP client for the server shared by all tests so connections are reused"""
+    with httpx.Client(base_url=f"http://localhost:{port}") as client:
+        yield client
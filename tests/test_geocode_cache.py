@@ -0,0 +1,131 @@
+"""Unit tests for GeocodeCache"""
+
+import sqlite3
+import time
+
+import pytest
+from geocode_cache import GeocodeCache
+
+RESULT = {"name": "SoFi Stadium", "locality": "Inglewood", "areasOfInterest": ["SoFi"]}
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Return path to the cache database"""
+    return tmp_path / "cache.db"
+
+
+def insert_row(db_path, latitude, longitude, created, data):
+    """Insert a row directly into the cache database"""
+    with sqlite3.connect(db_path) as db:
+        db.execute(
+            "INSERT OR REPLACE INTO geocode VALUES (?, ?, ?, ?)",
+            (latitude, longitude, created, data),
+        )
+    db.close()
+
+
+def test_get_set():
+    """Test a result is returned for the same or a nearby location"""
+    cache = GeocodeCache()
+    assert cache.get(33.953636, -118.33895) is None
+    assert cache.get_json(33.953636, -118.33895) is None
+    cache.set(33.953636, -118.33895, RESULT)
+    assert cache.get(33.953636, -118.33895) == RESULT
+    # rounds to the same key
+    assert cache.get(33.9536361, -118.338951) == RESULT
+    assert cache.get(33.95, -118.33) is None
+    assert (
+        cache.get_json(33.953636, -118.33895)
+        == b'{"name":"SoFi Stadium","locality":"Inglewood","areasOfInterest":["SoFi"]}'
+    )
+    assert len(cache) == 1
+
+
+def test_get_returns_copy():
+    """Test changing a result doesn't change the cached result"""
+    cache = GeocodeCache()
+    result = {"areasOfInterest": ["SoFi"]}
+    cache.set(1.0, 2.0, result)
+    result["areasOfInterest"].append("changed")
+    cached = cache.get(1.0, 2.0)
+    cached["areasOfInterest"].append("changed")
+    assert cache.get(1.0, 2.0) == {"areasOfInterest": ["SoFi"]}
+
+
+def test_ttl():
+    """Test expired results aren't returned and are removed"""
+    cache = GeocodeCache(ttl=-1)
+    cache.set(1.0, 2.0, RESULT)
+    assert cache.get(1.0, 2.0) is None
+    assert len(cache) == 0
+
+
+def test_lru_eviction():
+    """Test the least recently used result is evicted"""
+    cache = GeocodeCache(maxsize=2)
+    cache.set(1.0, 1.0, {"i": 1})
+    cache.set(2.0, 2.0, {"i": 2})
+    assert cache.get(1.0, 1.0) == {"i": 1}
+    cache.set(3.0, 3.0, {"i": 3})
+    assert len(cache) == 2
+    assert cache.get(2.0, 2.0) is None
+    assert cache.get(1.0, 1.0) == {"i": 1}
+    assert cache.get(3.0, 3.0) == {"i": 3}
+
+
+def test_clear():
+    """Test clear() removes all results"""
+    cache = GeocodeCache()
+    cache.set(1.0, 1.0, RESULT)
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.get(1.0, 1.0) is None
+
+
+def test_reload(db_path):
+    """Test results are loaded from the database, without the ones evicted or cleared"""
+    cache = GeocodeCache(maxsize=2, path=db_path)
+    cache.set(1.0, 1.0, {"i": 1})
+    cache.set(2.0, 2.0, {"i": 2})
+    cache.set(3.0, 3.0, {"i": 3})
+    cache.close()
+    # still works in memory after the database is closed
+    assert cache.get(3.0, 3.0) == {"i": 3}
+
+    cache = GeocodeCache(maxsize=2, path=db_path)
+    assert len(cache) == 2
+    assert cache.get(1.0, 1.0) is None
+    assert cache.get(2.0, 2.0) == {"i": 2}
+    assert cache.get_json(3.0, 3.0) == b'{"i":3}'
+    cache.clear()
+    cache.close()
+
+    cache = GeocodeCache(path=db_path)
+    assert len(cache) == 0
+    cache.close()
+
+
+def test_reload_skips_expired_and_corrupt_rows(db_path):
+    """Test expired rows and rows that can't be decoded aren't loaded"""
+    cache = GeocodeCache(ttl=60, path=db_path)
+    cache.set(1.0, 1.0, {"i": 1})
+    cache.close()
+    insert_row(db_path, 2.0, 2.0, time.time(), "not json")
+    insert_row(db_path, 3.0, 3.0, time.time(), None)
+    insert_row(db_path, 4.0, 4.0, time.time() - 120, '{"i":4}')
+
+    cache = GeocodeCache(ttl=60, path=db_path)
+    assert len(cache) == 1
+    assert cache.get(1.0, 1.0) == {"i": 1}
+    cache.close()
+
+
+def test_bad_path(tmp_path):
+    """Test the cache works in memory if the database can't be opened"""
+    not_a_dir = tmp_path / "file"
+    not_a_dir.write_text("")
+    cache = GeocodeCache(path=not_a_dir / "cache.db")
+    cache.set(1.0, 1.0, RESULT)
+    assert cache.get(1.0, 1.0) == RESULT
+    cache.close()
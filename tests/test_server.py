@@ -1,11 +1,15 @@
 """Test Locationator server"""
 
+import concurrent.futures
+import http.client
 import subprocess
 import time
 
-import httpx
 import pytest
 
+# these tests run against the app launched by the setup_teardown fixture
+pytestmark = pytest.mark.usefixtures("setup_teardown")
+
 # test coordinates for SoFi stadium
 LAT_LONG = (33.953636, -118.338950)
 LATITUDE = LAT_LONG[0]
@@ -41,127 +45,229 @@ REVERSE_GEOCODE = {
 }
 
 
+def wait_for_wifi(connected: bool, timeout: float = 30.0):
+    """Wait until WiFi (en0) has an IP address if connected is True or has none if False"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        # prints the interface's address and exits 0 only if it has one
+        result = subprocess.run(
+            ["ipconfig", "getifaddr", "en0"], capture_output=True, text=True
+        )
+        if (result.returncode == 0 and bool(result.stdout.strip())) == connected:
+            return
+        time.sleep(0.25)
+    raise RuntimeError(
+        f"Timed out waiting for WiFi to turn {'on' if connected else 'off'}"
+    )
+
+
 @pytest.fixture(scope="function")
 def wifi_off():
     """test fixture that turns off wifi at start of test and back on at end of test"""
     subprocess.run(["networksetup", "-setairportpower", "en0", "off"])
-    time.sleep(10)
+    wait_for_wifi(False)
     yield
     subprocess.run(["networksetup", "-setairportpower", "en0", "on"])
-    time.sleep(15)  # takes longer to turn back on that to turn off
+    wait_for_wifi(True)
 
 
-def test_get_root(port):
+def test_get_root(client):
     """Test GET /"""
-    with httpx.Client() as client:
-        response = client.get(f"http://localhost:{port}/")
+    response = client.get("/")
+    assert response.status_code == 200
+    assert response.text.startswith("Locationator server version")
+
+
+def test_get_keep_alive(client):
+    """Test sequential requests reuse the same HTTP/1.1 connection"""
+    for _ in range(3):
+        response = client.get("/")
         assert response.status_code == 200
-        assert response.text.startswith("Locationator server version")
+        assert response.http_version == "HTTP/1.1"
+        assert int(response.headers["Content-Length"]) == len(response.content)
+        assert response.headers.get("Connection", "").lower() != "close"
 
 
-def test_get_reverse_geocode_bad_1(port):
-    """Test GET /reverse_geocode"""
-    with httpx.Client() as client:
-        response = client.get(f"http://localhost:{port}/reverse_geocode")
-        assert response.status_code == 400
-        assert response.text == "Bad request: Missing latitude or longitude query arg"
+@pytest.mark.parametrize(
+    "query,error",
+    [
+        ("", "Missing latitude or longitude query arg"),
+        (f"?latitude={LATITUDE}", "Missing latitude or longitude query arg"),
+        (f"?longitude={LONGITUDE}", "Missing latitude or longitude query arg"),
+        (f"?latitude=100&longitude={LONGITUDE}", "Invalid latitude"),
+        (f"?latitude={LATITUDE}&longitude=300", "Invalid longitude"),
+    ],
+)
+def test_get_reverse_geocode_bad_request(client, query, error):
+    """Test GET /reverse_geocode with missing or invalid query args"""
+    response = client.get(f"/reverse_geocode{query}")
+    assert response.status_code == 400
+    assert response.text == f"Bad request: {error}"
 
 
-def test_get_reverse_geocode_missing_longitude(port):
-    """Test GET /reverse_geocode?latitude="""
-    with httpx.Client() as client:
-        response = client.get(
-            f"http://localhost:{port}/reverse_geocode?latitude={LATITUDE}"
-        )
-        assert response.status_code == 400
-        assert response.text == "Bad request: Missing latitude or longitude query arg"
+def test_get_reverse_geocode_valid(client):
+    """Test GET /reverse_geocode?latitude=&longitude="""
+    response = client.get(f"/reverse_geocode?latitude={LATITUDE}&longitude={LONGITUDE}")
+    assert response.status_code == 200
+    assert response.json() == REVERSE_GEOCODE
 
 
-def test_get_reverse_geocode_missing_latitude(port):
-    """Test GET /reverse_geocode?longitude="""
-    with httpx.Client() as client:
-        response = client.get(
-            f"http://localhost:{port}/reverse_geocode?longitude={LONGITUDE}"
-        )
-        assert response.status_code == 400
-        assert response.text == "Bad request: Missing latitude or longitude query arg"
+def test_get_reverse_geocode_url_encoded(client):
+    """Test GET /reverse_geocode with URL encoded query args"""
+    # %2D is "-"
+    response = client.get(
+        f"/reverse_geocode?latitude={LATITUDE}&longitude=%2D{abs(LONGITUDE)}"
+    )
+    assert response.status_code == 200
+    assert response.json() == REVERSE_GEOCODE
 
 
-def test_get_reverse_geocode_bad_latitude(port):
-    """Test GET /reverse_geocode?latitude=bad&longitude="""
-    with httpx.Client() as client:
-        response = client.get(
-            f"http://localhost:{port}/reverse_geocode?latitude=100&longitude={LONGITUDE}"
-        )
-        assert response.status_code == 400
-        assert response.text == "Bad request: Invalid latitude"
+def test_get_reverse_geocode_nocache(client):
+    """Test GET /reverse_geocode?latitude=&longitude=&nocache=1"""
+    response = client.get(
+        f"/reverse_geocode?latitude={LATITUDE}&longitude={LONGITUDE}&nocache=1"
+    )
+    assert response.status_code == 200
+    assert response.json() == REVERSE_GEOCODE
 
 
-def test_get_reverse_geocode_bad_longitude(port):
-    """Test GET /reverse_geocode?latitude=&longitude=bad"""
-    with httpx.Client() as client:
-        response = client.get(
-            f"http://localhost:{port}/reverse_geocode?latitude={LATITUDE}&longitude=300"
-        )
-        assert response.status_code == 400
-        assert response.text == "Bad request: Invalid longitude"
+def test_get_reverse_geocode_concurrent(client):
+    """Test concurrent GET /reverse_geocode requests for the same location"""
 
+    def _get(_):
+        # httpx.Client is thread-safe so the threads share its connection pool
+        return client.get(f"/reverse_geocode?latitude={LATITUDE}&longitude={LONGITUDE}")
 
-def test_get_reverse_geocode_valid(port):
-    """Test GET /reverse_geocode?latitude=&longitude="""
-    with httpx.Client() as client:
-        response = client.get(
-            f"http://localhost:{port}/reverse_geocode?latitude={LATITUDE}&longitude={LONGITUDE}"
-        )
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+        responses = list(executor.map(_get, range(8)))
+    for response in responses:
         assert response.status_code == 200
         assert response.json() == REVERSE_GEOCODE
 
 
-def test_get_reverse_geocode_server_error(port, wifi_off):
-    """Test GET /reverse_geocode with error (no network, assumes network is via WiFi"""
-    with httpx.Client() as client:
-        response = client.get(
-            f"http://localhost:{port}/reverse_geocode?latitude={LATITUDE}&longitude={LONGITUDE}"
+def test_post_reverse_geocode_valid(client):
+    """Test POST /reverse_geocode"""
+    response = client.post(
+        "/reverse_geocode",
+        json=[
+            {"latitude": LATITUDE, "longitude": LONGITUDE},
+            {"latitude": LATITUDE, "longitude": LONGITUDE},
+        ],
+        timeout=30,
+    )
+    assert response.status_code == 200
+    assert response.json() == [
+        {"success": True, "result": REVERSE_GEOCODE},
+        {"success": True, "result": REVERSE_GEOCODE},
+    ]
+
+
+def test_post_reverse_geocode_bad_body(client):
+    """Test POST /reverse_geocode with body that is not a JSON array"""
+    response = client.post(
+        "/reverse_geocode",
+        json={"latitude": LATITUDE, "longitude": LONGITUDE},
+    )
+    assert response.status_code == 400
+    assert response.text == "Bad request: Body must be a JSON array"
+
+
+@pytest.mark.parametrize(
+    "content_type, status_code",
+    [
+        ("application/json", 200),
+        ("application/json; charset=utf-8", 200),
+        ("Application/JSON", 200),
+        ("text/plain", 415),
+        ("application/x-www-form-urlencoded", 415),
+        ("json", 415),
+    ],
+)
+def test_post_reverse_geocode_content_type(client, content_type, status_code):
+    """Test POST /reverse_geocode accepts only a JSON Content-Type"""
+    response = client.post(
+        "/reverse_geocode", content=b"[]", headers={"Content-Type": content_type}
+    )
+    assert response.status_code == status_code
+    if status_code == 200:
+        assert response.json() == []
+    else:
+        assert response.text == (
+            "Unsupported media type: Content-Type must be application/json"
         )
-        assert response.status_code == 500
-        assert "Error" in response.text
+        assert response.headers["Connection"] == "close"
+
+
+def test_post_reverse_geocode_bad_latitude(client):
+    """Test POST /reverse_geocode with invalid latitude"""
+    response = client.post(
+        "/reverse_geocode",
+        json=[
+            {"latitude": LATITUDE, "longitude": LONGITUDE},
+            {"latitude": 100, "longitude": LONGITUDE},
+        ],
+    )
+    assert response.status_code == 400
+    assert response.text == "Bad request: Invalid latitude at index 1"
+
+
+def test_post_reverse_geocode_too_large(port):
+    """Test POST /reverse_geocode with a body larger than the server accepts"""
+    # announce the body without sending it; the server must reject it without reading
+    connection = http.client.HTTPConnection("localhost", port)
+    connection.putrequest("POST", "/reverse_geocode")
+    connection.putheader("Content-Length", str(1024 * 1024 * 1024))
+    connection.endheaders()
+    response = connection.getresponse()
+    assert response.status == 413
+    assert response.read().startswith(b"Payload too large:")
+    connection.close()
+
+
+def test_post_not_found_closes_connection(client):
+    """Test POST to an unknown path closes the connection as the body isn't read"""
+    response = client.post("/not_found", json=[])
+    assert response.status_code == 404
+    assert response.headers["Connection"].lower() == "close"
 
 
-def test_get_current_location_no_accuracy(port):
+def test_get_reverse_geocode_server_error(client, wifi_off):
+    """Test GET /reverse_geocode with error (no network, assumes network is via WiFi"""
+    # bypass the cache, which holds this location from earlier tests
+    response = client.get(
+        f"/reverse_geocode?latitude={LATITUDE}&longitude={LONGITUDE}&nocache=1"
+    )
+    assert response.status_code == 500
+    assert "Error" in response.text
+
+
+def test_get_current_location_no_accuracy(client):
     """Test GET /current_location"""
-    with httpx.Client() as client:
-        response = client.get(f"http://localhost:{port}/current_location")
-        assert response.status_code == 200
-        assert response.json().get("latitude") is not None
-        assert response.json().get("longitude") is not None
-        assert response.json().get("error") is None
+    response = client.get("/current_location")
+    assert response.status_code == 200
+    assert response.json().get("latitude") is not None
+    assert response.json().get("longitude") is not None
+    assert response.json().get("error") is None
 
 
-def test_get_current_location_with_accuracy(port):
+def test_get_current_location_with_accuracy(client):
     """Test GET /current_location?accuracy=reduced"""
-    with httpx.Client() as client:
-        response = client.get(
-            f"http://localhost:{port}/current_location?accuracy=reduced"
-        )
-        assert response.status_code == 200
-        assert response.json().get("latitude") is not None
-        assert response.json().get("longitude") is not None
-        assert response.json().get("error") is None
+    response = client.get("/current_location?accuracy=reduced")
+    assert response.status_code == 200
+    assert response.json().get("latitude") is not None
+    assert response.json().get("longitude") is not None
+    assert response.json().get("error") is None
 
 
-def test_get_current_location_invalid_accuracy(port):
+def test_get_current_location_invalid_accuracy(client):
     """Test GET /current_location?accuracy=invalid"""
-    with httpx.Client() as client:
-        response = client.get(
-            f"http://localhost:{port}/current_location?accuracy=invalid"
-        )
-        assert response.status_code == 400
-        assert "Invalid accuracy" in response.text
+    response = client.get("/current_location?accuracy=invalid")
+    assert response.status_code == 400
+    assert "Invalid accuracy" in response.text
 
 
-def test_get_current_location_server_error(port, wifi_off):
+def test_get_current_location_server_error(client, wifi_off):
     """Test GET /current_location with error (no network, assumes network is via WiFi"""
-    with httpx.Client() as client:
-        response = client.get(f"http://localhost:{port}/current_location?timeout=0")
-        assert response.status_code == 500
-        assert "Error" in response.text
+    response = client.get("/current_location?timeout=0")
+    assert response.status_code == 500
+    assert "Error" in response.text
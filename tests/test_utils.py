@@ -0,0 +1,77 @@
+"""Unit tests for the latitude/longitude parsing and validation in utils.py"""
+
+import pytest
+from utils import LAT_LONG_RE, get_lat_long_from_string, validate_latlng_batch
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("37.33, -122.03", (37.33, -122.03)),
+        ("37.33,-122.03", (37.33, -122.03)),
+        ("37.33 -122.03", (37.33, -122.03)),
+        ("  +37.33 ,\t-122.03  ", (37.33, -122.03)),
+        ("37 -122", (37.0, -122.0)),
+        (".5, 1.", (0.5, 1.0)),
+    ],
+)
+def test_get_lat_long_from_string(value, expected):
+    """Test parsing latitude/longitude separated by a comma and/or whitespace"""
+    assert get_lat_long_from_string(value) == expected
+
+
+@pytest.mark.parametrize(
+    "value",
+    ["", "37.33", "37.33,,-122.03", "37.33, -122.03, 1", "a, b", "1.2.3, 4", "., 1"],
+)
+def test_lat_long_re_no_match(value):
+    """Test strings that aren't a latitude/longitude pair don't match"""
+    assert LAT_LONG_RE.match(value) is None
+    with pytest.raises(ValueError):
+        get_lat_long_from_string(value)
+
+
+@pytest.mark.parametrize("value", ["91, 0", "-90.5, 0", "0, 180.1", "0, -181"])
+def test_get_lat_long_from_string_out_of_range(value):
+    """Test latitude/longitude out of range raise ValueError"""
+    with pytest.raises(ValueError, match="Invalid"):
+        get_lat_long_from_string(value)
+
+
+def test_validate_latlng_batch():
+    """Test valid points are returned as tuples of floats"""
+    points = [
+        {"latitude": 33.953636, "longitude": -118.33895},
+        {"latitude": 90, "longitude": -180},
+        {"latitude": "-90", "longitude": "180.0", "extra": True},
+    ]
+    assert validate_latlng_batch(points) == [
+        (33.953636, -118.33895),
+        (90.0, -180.0),
+        (-90.0, 180.0),
+    ]
+    assert validate_latlng_batch([]) == []
+
+
+@pytest.mark.parametrize(
+    "point, message",
+    [
+        ({"latitude": 1.0}, "Missing latitude or longitude at index 1"),
+        ([1.0, 2.0], "Missing latitude or longitude at index 1"),
+        (None, "Missing latitude or longitude at index 1"),
+        ({"latitude": 90.5, "longitude": 0}, "Invalid latitude at index 1"),
+        ({"latitude": True, "longitude": 0}, "Invalid latitude at index 1"),
+        ({"latitude": None, "longitude": 0}, "Invalid latitude at index 1"),
+        ({"latitude": "abc", "longitude": 0}, "Invalid latitude at index 1"),
+        ({"latitude": float("nan"), "longitude": 0}, "Invalid latitude at index 1"),
+        ({"latitude": 0, "longitude": -180.5}, "Invalid longitude at index 1"),
+        ({"latitude": 0, "longitude": False}, "Invalid longitude at index 1"),
+        ({"latitude": 0, "longitude": "inf"}, "Invalid longitude at index 1"),
+        ({"latitude": 0, "longitude": [1]}, "Invalid longitude at index 1"),
+    ],
+)
+def test_validate_latlng_batch_invalid(point, message):
+    """Test the first invalid point raises ValueError with its index"""
+    points = [{"latitude": 0.0, "longitude": 0.0}, point, {"latitude": 100}]
+    with pytest.raises(ValueError, match=message):
+        validate_latlng_batch(points)
@@ -0,0 +1,126 @@
+"""Unit tests for the JPEG XMP packet functions in xmp.py"""
+
+import os
+
+import pytest
+from xmp import (
+    XMP_APP1_HEADER,
+    _pad_xmp_packet,
+    is_jpeg,
+    jpeg_read_xmp,
+    jpeg_replace_xmp,
+)
+
+JPEG_SOI = b"\xff\xd8"
+JPEG_EOI = b"\xff\xd9"
+
+PACKET_END = b'<?xpacket end="w"?>'
+PACKET = (
+    b'<?xpacket begin="\xef\xbb\xbf" id="W5M0MpCehiHzreSzNTczkc9d"?>'
+    + b'<x:xmpmeta xmlns:x="adobe:ns:meta/"/>'
+    + b" " * 64
+    + PACKET_END
+)
+
+
+def segment(marker: int, payload: bytes) -> bytes:
+    """Return a JPEG marker segment; the length includes the two length bytes"""
+    return bytes([0xFF, marker]) + (len(payload) + 2).to_bytes(2, "big") + payload
+
+
+APP0 = segment(0xE0, b"JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00")
+EXIF_APP1 = segment(0xE1, b"Exif\x00\x00" + bytes(16))
+XMP_APP1 = segment(0xE1, XMP_APP1_HEADER + PACKET)
+IMAGE_DATA = segment(0xDA, bytes(10)) + b"\x12\x34\x56" + JPEG_EOI
+
+
+def write_jpeg(path, *segments: bytes) -> bytes:
+    """Write a JPEG made of segments to path and return its contents"""
+    data = JPEG_SOI + b"".join(segments) + IMAGE_DATA
+    path.write_bytes(data)
+    return data
+
+
+def test_is_jpeg(tmp_path):
+    """Test is_jpeg() checks the magic bytes"""
+    jpeg = tmp_path / "test.jpg"
+    write_jpeg(jpeg, APP0)
+    other = tmp_path / "test.png"
+    other.write_bytes(b"\x89PNG\r\n\x1a\n")
+    assert is_jpeg(jpeg)
+    assert not is_jpeg(other)
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        JPEG_SOI + APP0 + IMAGE_DATA,
+        JPEG_SOI + APP0 + EXIF_APP1 + IMAGE_DATA,
+        # the XMP segment claims to extend past the end of the file
+        JPEG_SOI + APP0 + EXIF_APP1 + XMP_APP1[:-10],
+    ],
+    ids=["no_app1", "non_xmp_app1", "truncated"],
+)
+def test_jpeg_without_xmp_packet(tmp_path, data):
+    """Test a JPEG without a complete XMP packet is left unchanged"""
+    jpeg = tmp_path / "test.jpg"
+    jpeg.write_bytes(data)
+    assert jpeg_read_xmp(jpeg) is None
+    assert not jpeg_replace_xmp(jpeg, PACKET)
+    assert jpeg.read_bytes() == data
+    assert os.listdir(tmp_path) == ["test.jpg"]
+
+
+def test_jpeg_read_xmp(tmp_path):
+    """Test the XMP packet is found after a non-XMP APP1 segment"""
+    jpeg = tmp_path / "test.jpg"
+    write_jpeg(jpeg, APP0, EXIF_APP1, XMP_APP1)
+    assert jpeg_read_xmp(jpeg) == PACKET
+
+
+def test_jpeg_replace_xmp(tmp_path):
+    """Test a smaller packet replaces the existing one padded to the same size"""
+    jpeg = tmp_path / "test.jpg"
+    data = write_jpeg(jpeg, APP0, EXIF_APP1, XMP_APP1)
+    new_packet = PACKET.replace(b" " * 64, b"<x:new/>")
+    assert jpeg_replace_xmp(jpeg, new_packet)
+
+    packet = jpeg_read_xmp(jpeg)
+    assert len(packet) == len(PACKET)
+    assert packet.startswith(new_packet[: -len(PACKET_END)])
+    assert packet.endswith(b" " + PACKET_END)
+    # only the packet changed
+    start = data.index(PACKET)
+    new_data = jpeg.read_bytes()
+    assert new_data[:start] == data[:start]
+    assert new_data[start + len(PACKET) :] == data[start + len(PACKET) :]
+    assert os.listdir(tmp_path) == ["test.jpg"]
+
+
+def test_jpeg_replace_xmp_too_large(tmp_path):
+    """Test a packet larger than the existing one is not written"""
+    jpeg = tmp_path / "test.jpg"
+    data = write_jpeg(jpeg, APP0, XMP_APP1)
+    assert not jpeg_replace_xmp(jpeg, PACKET + b" ")
+    assert jpeg.read_bytes() == data
+    assert os.listdir(tmp_path) == ["test.jpg"]
+
+
+def test_jpeg_replace_xmp_symlink(tmp_path):
+    """Test the file a symlink points to is updated and the symlink kept"""
+    jpeg = tmp_path / "test.jpg"
+    write_jpeg(jpeg, APP0, XMP_APP1)
+    link = tmp_path / "link.jpg"
+    link.symlink_to(jpeg)
+    new_packet = PACKET.replace(b" " * 64, b"<x:new/>")
+    assert jpeg_replace_xmp(link, new_packet)
+    assert link.is_symlink()
+    assert b"<x:new/>" in jpeg_read_xmp(jpeg)
+
+
+def test_pad_xmp_packet():
+    """Test padding goes before the xpacket trailer or at the end if there isn't one"""
+    assert _pad_xmp_packet(b"<a/>" + PACKET_END, 30) == b"<a/>" + b" " * 7 + PACKET_END
+    assert _pad_xmp_packet(b"<a/>", 6) == b"<a/>  "
+    assert _pad_xmp_packet(b"<a/>", 4) == b"<a/>"
+    assert _pad_xmp_packet(b"<a/>", 3) is None